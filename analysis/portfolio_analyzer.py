@@ -5,14 +5,30 @@ Portfolio analysis module for analyzing holdings and trends over time.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from database.db_manager import DatabaseManager
+import importlib.util
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Numba is optional; when installed, numeric groupby reductions use pandas' cached JIT engine.
+# find_spec only locates the package, so numba itself is imported on first use by pandas.
+if importlib.util.find_spec('numba') is not None:
+    _GROUPBY_ENGINE = {'engine': 'numba', 'engine_kwargs': {'nopython': True, 'nogil': True}}
+else:
+    _GROUPBY_ENGINE = {}
+
+
+def _records_to_frame(records: Tuple[Tuple[str, ...], List[tuple]]) -> pd.DataFrame:
+    """Build a DataFrame from a (columns, rows) pair of plain tuples."""
+    columns, rows = records
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
 class PortfolioAnalyzer:
     """Analyzes portfolio holdings and performance over time."""
 
@@ -35,22 +51,11 @@ class PortfolioAnalyzer:
         Returns:
             DataFrame with allocation data
         """
-        data = self.db.get_portfolio_allocation()
-        df = pd.DataFrame(data)
+        data = self.db.get_portfolio_allocation(institution=institution, as_records=True)
+        df = _records_to_frame(data)
 
         if df.empty:
             logger.warning("No allocation data found")
-            return df
-
-        if institution:
-            df = df[df['institution_name'] == institution]
-
-        # Calculate percentages
-        if not df.empty:
-            # Convert Decimal to float to avoid type mismatch
-            df['total_value'] = df['total_value'].astype(float)
-            total_by_account = df.groupby(['institution_name', 'account_number'])['total_value'].transform('sum')
-            df['percentage'] = (df['total_value'] / total_by_account * 100).round(2)
 
         return df
 
@@ -61,10 +66,10 @@ class PortfolioAnalyzer:
         Returns:
             Dictionary with portfolio summary statistics
         """
-        holdings = self.db.get_latest_holdings()
-        df = pd.DataFrame(holdings)
+        rows = self.db.get_portfolio_summary_agg()
+        totals = next((r for r in rows if r['kind'] == 'total'), None)
 
-        if df.empty:
+        if not totals or not totals['num_securities']:
             return {
                 'total_value': 0,
                 'num_accounts': 0,
@@ -72,26 +77,30 @@ class PortfolioAnalyzer:
                 'num_institutions': 0
             }
 
+        total_value = float(totals['market_value'] or 0)
+        total_book = float(totals['book_value'] or 0)
+
         summary = {
-            'total_value': float(df['market_value'].sum()),
-            'num_accounts': int(df[['institution_name', 'account_number']].drop_duplicates().shape[0]),
-            'num_securities': int(df['security_name'].nunique()),
-            'num_institutions': int(df['institution_name'].nunique()),
-            'total_gain_loss': float((df['market_value'] - df['book_value']).sum()),
-            'total_gain_loss_pct': float(((df['market_value'].sum() - df['book_value'].sum()) /
-                                         df['book_value'].sum() * 100)) if df['book_value'].sum() > 0 else 0
+            'total_value': total_value,
+            'num_accounts': int(totals['num_accounts']),
+            'num_securities': int(totals['num_securities']),
+            'num_institutions': int(totals['num_institutions']),
+            'total_gain_loss': float(totals['gain_loss'] or 0),
+            'total_gain_loss_pct': float((total_value - total_book) / total_book * 100) if total_book > 0 else 0
         }
 
         # Breakdown by institution
-        summary['by_institution'] = df.groupby('institution_name').agg({
-            'market_value': 'sum',
-            'security_name': 'nunique'
-        }).to_dict()
+        institution_rows = [r for r in rows if r['kind'] == 'institution']
+        summary['by_institution'] = {
+            'market_value': {r['label']: float(r['market_value'] or 0) for r in institution_rows},
+            'security_name': {r['label']: int(r['num_securities']) for r in institution_rows}
+        }
 
         # Breakdown by asset category
-        summary['by_asset_category'] = df.groupby('asset_category').agg({
-            'market_value': 'sum'
-        }).to_dict()
+        summary['by_asset_category'] = {
+            'market_value': {r['label']: float(r['market_value'] or 0)
+                             for r in rows if r['kind'] == 'category'}
+        }
 
         return summary
 
@@ -107,12 +116,14 @@ class PortfolioAnalyzer:
         Returns:
             DataFrame with holdings data
         """
-        holdings = self.db.get_latest_holdings(institution, account_number)
-        df = pd.DataFrame(holdings)
+        if institution and account_number:
+            holdings = self.db.get_holdings_for_account(institution, account_number, as_records=True)
+        else:
+            holdings = self.db.get_latest_holdings(institution, account_number, as_records=True,
+                                                   columns=None)
+        df = _records_to_frame(holdings)
 
         if not df.empty:
-            # Convert Decimal to float to avoid type mismatch
-            df['market_value'] = df['market_value'].astype(float)
             # Add some calculated columns
             df['weight'] = (df['market_value'] / df['market_value'].sum() * 100).round(2)
 
@@ -135,8 +146,9 @@ class PortfolioAnalyzer:
         Returns:
             DataFrame with value trend data
         """
-        data = self.db.get_portfolio_value_trend(institution, start_date, end_date, monthly)
-        df = pd.DataFrame(data)
+        data = self.db.get_portfolio_value_trend(institution, start_date, end_date, monthly,
+                                                 as_records=True)
+        df = _records_to_frame(data)
 
         if not df.empty:
             df['statement_date'] = pd.to_datetime(df['statement_date'])
@@ -168,18 +180,15 @@ class PortfolioAnalyzer:
         # Sort by date
         df = df.sort_values(['institution_name', 'account_number', 'statement_date'])
 
-        # Convert Decimal to float to avoid type mismatch
-        df['total_account_value'] = df['total_account_value'].astype(float)
+        # One grouper, reused for both the previous and the first value per account
+        values = df.groupby(['institution_name', 'account_number'], sort=False)['total_account_value']
 
         # Calculate returns
-        df['prev_value'] = df.groupby(['institution_name', 'account_number'])['total_account_value'].shift(1)
+        df['prev_value'] = values.shift(1)
         df['return_pct'] = ((df['total_account_value'] - df['prev_value']) / df['prev_value'] * 100).round(2)
 
         # Calculate cumulative returns
-        df['cumulative_return'] = (
-            (df['total_account_value'] /
-             df.groupby(['institution_name', 'account_number'])['total_account_value'].transform('first') - 1) * 100
-        ).round(2)
+        df['cumulative_return'] = ((df['total_account_value'] / values.transform('first') - 1) * 100).round(2)
 
         return df
 
@@ -195,14 +204,17 @@ class PortfolioAnalyzer:
         Returns:
             DataFrame with allocation trend data
         """
-        # Get all statements within date range
+        # Get all statements within date range; percentage is the share of
+        # each row in the total value for its statement date
         query = """
             SELECT
                 s.statement_date,
                 i.institution_name,
                 a.account_number,
                 at.asset_category,
-                SUM(h.market_value) as total_value
+                SUM(h.market_value) as total_value,
+                ROUND(SUM(h.market_value) * 100 /
+                      NULLIF(SUM(SUM(h.market_value)) OVER (PARTITION BY s.statement_date), 0), 2) as percentage
             FROM holdings h
             JOIN statements s ON h.statement_id = s.statement_id
             JOIN accounts a ON h.account_id = a.account_id
@@ -226,19 +238,13 @@ class PortfolioAnalyzer:
             ORDER BY s.statement_date, i.institution_name, a.account_number, at.asset_category
         """
 
-        data = self.db.execute_query(query, tuple(params) if params else None, fetch=True)
-        df = pd.DataFrame(data)
+        data = self.db.execute_query(query, tuple(params) if params else None, fetch=True,
+                                     as_records=True)
+        df = _records_to_frame(data)
 
         if not df.empty:
             df['statement_date'] = pd.to_datetime(df['statement_date'])
 
-            # Convert Decimal to float to avoid type mismatch
-            df['total_value'] = df['total_value'].astype(float)
-
-            # Calculate percentages by date
-            total_by_date = df.groupby('statement_date')['total_value'].transform('sum')
-            df['percentage'] = (df['total_value'] / total_by_date * 100).round(2)
-
         return df
 
     def get_top_holdings(self, n: int = 10) -> pd.DataFrame:
@@ -251,25 +257,7 @@ class PortfolioAnalyzer:
         Returns:
             DataFrame with top holdings
         """
-        holdings = self.db.get_latest_holdings()
-        df = pd.DataFrame(holdings)
-
-        if df.empty:
-            return df
-
-        # Convert Decimal to float to avoid type mismatch
-        df['market_value'] = df['market_value'].astype(float)
-
-        # Sort by market value and get top N
-        df = df.nlargest(n, 'market_value')
-
-        # Calculate percentage of total portfolio
-        total_value = df['market_value'].sum()
-        df['portfolio_pct'] = (df['market_value'] / total_value * 100).round(2)
-
-        return df[['security_name', 'symbol', 'asset_category', 'quantity',
-                  'price', 'market_value', 'portfolio_pct', 'institution_name',
-                  'account_number']]
+        return _records_to_frame(self.db.get_top_holdings(n, as_records=True))
 
     def get_concentration_risk(self) -> Dict:
         """
@@ -278,34 +266,30 @@ class PortfolioAnalyzer:
         Returns:
             Dictionary with concentration metrics
         """
-        holdings = self.db.get_latest_holdings()
-        df = pd.DataFrame(holdings)
+        holdings = self.db.get_latest_holdings(as_records=True)
+        return self._concentration_from_df(_records_to_frame(holdings))
 
+    def _concentration_from_df(self, df: pd.DataFrame) -> Dict:
+        """Concentration metrics from a latest-holdings frame."""
         if df.empty:
             return {}
 
-        # Convert Decimal to float to avoid type mismatch
-        df['market_value'] = df['market_value'].astype(float)
-
-        total_value = df['market_value'].sum()
+        values = df['market_value'].to_numpy(dtype=np.float64, na_value=0.0)
+        total_value = values.sum()
 
-        # Top 5 holdings concentration
-        top5_value = df.nlargest(5, 'market_value')['market_value'].sum()
-        top5_pct = (top5_value / total_value * 100).round(2)
+        # Top 5 / top 10 holdings concentration from a single partial sort
+        k = min(10, len(values))
+        top_idx = np.argpartition(-values, k - 1)[:k]
+        top_values = np.sort(values[top_idx])[::-1]
+        top5_pct = round(top_values[:5].sum() / total_value * 100, 2)
+        top10_pct = round(top_values.sum() / total_value * 100, 2)
 
-        # Top 10 holdings concentration
-        top10_value = df.nlargest(10, 'market_value')['market_value'].sum()
-        top10_pct = (top10_value / total_value * 100).round(2)
+        # Asset category and institution concentration
+        max_category, max_category_value = self._max_group_total(df['asset_category'], values)
+        max_category_pct = round(max_category_value / total_value * 100, 2)
 
-        # Asset category concentration
-        category_concentration = df.groupby('asset_category')['market_value'].sum()
-        max_category = category_concentration.idxmax()
-        max_category_pct = (category_concentration.max() / total_value * 100).round(2)
-
-        # Institution concentration
-        institution_concentration = df.groupby('institution_name')['market_value'].sum()
-        max_institution = institution_concentration.idxmax()
-        max_institution_pct = (institution_concentration.max() / total_value * 100).round(2)
+        max_institution, max_institution_value = self._max_group_total(df['institution_name'], values)
+        max_institution_pct = round(max_institution_value / total_value * 100, 2)
 
         return {
             'top5_concentration': float(top5_pct),
@@ -317,6 +301,26 @@ class PortfolioAnalyzer:
             'num_holdings': len(df)
         }
 
+    @staticmethod
+    def _max_group_total(keys: pd.Series, values: np.ndarray):
+        """
+        Find the group with the largest summed value.
+
+        Args:
+            keys: Group labels aligned with values
+            values: float64 values to sum per group
+
+        Returns:
+            Tuple of (group label, group total)
+        """
+        categorical = pd.Categorical(keys)
+        codes = categorical.codes
+        mask = codes >= 0
+        totals = np.bincount(codes[mask], weights=values[mask],
+                             minlength=len(categorical.categories))
+        idx = int(totals.argmax())
+        return categorical.categories[idx], totals[idx]
+
     def get_diversification_score(self) -> Dict:
         """
         Calculate diversification metrics.
@@ -324,34 +328,143 @@ class PortfolioAnalyzer:
         Returns:
             Dictionary with diversification scores
         """
-        holdings = self.db.get_latest_holdings()
-        df = pd.DataFrame(holdings)
+        columns, holdings = self.db.get_latest_holdings(as_records=True)
+
+        if not holdings:
+            return {}
+
+        value_idx = columns.index('market_value')
+        category_idx = columns.index('asset_category')
+        values = np.fromiter((h[value_idx] or 0.0 for h in holdings),
+                             dtype=np.float64, count=len(holdings))
+        categories = np.array([h[category_idx] for h in holdings], dtype=object)
+        return self._diversification_from_arrays(values, categories)
 
+    def _diversification_from_df(self, df: pd.DataFrame) -> Dict:
+        """Diversification metrics from a latest-holdings frame."""
         if df.empty:
             return {}
 
-        total_value = df['market_value'].sum()
-        weights = df['market_value'] / total_value
+        return self._diversification_from_arrays(
+            df['market_value'].to_numpy(dtype=np.float64, na_value=0.0),
+            df['asset_category'].to_numpy(dtype=object)
+        )
+
+    @staticmethod
+    def _diversification_from_arrays(values: np.ndarray, asset_categories: np.ndarray) -> Dict:
+        """
+        Diversification metrics from aligned market value and asset category arrays.
+
+        Args:
+            values: float64 market values
+            asset_categories: Asset category label per holding
+
+        Returns:
+            Dictionary with diversification scores
+        """
+        num_holdings = len(values)
+        total_value = values.sum()
+        weights = values / total_value
 
         # Herfindahl-Hirschman Index (HHI)
         # Lower is more diversified, ranges from 1/N to 1
-        hhi = (weights ** 2).sum()
+        hhi = np.dot(weights, weights)
 
         # Effective number of holdings
         # Higher is more diversified
         effective_n = 1 / hhi
 
         # Asset category diversification
-        category_weights = df.groupby('asset_category')['market_value'].sum() / total_value
-        category_hhi = (category_weights ** 2).sum()
+        codes, categories = pd.factorize(asset_categories)
+        mask = codes >= 0
+        category_weights = np.bincount(codes[mask], weights=values[mask],
+                                       minlength=len(categories)) / total_value
+        category_hhi = np.dot(category_weights, category_weights)
         category_effective_n = 1 / category_hhi
 
         return {
             'hhi': float(hhi),
             'effective_number_holdings': float(effective_n),
-            'actual_number_holdings': len(df),
+            'actual_number_holdings': num_holdings,
             'category_hhi': float(category_hhi),
             'category_effective_n': float(category_effective_n),
-            'num_categories': len(category_weights),
-            'diversification_ratio': float(effective_n / len(df))
+            'num_categories': len(categories),
+            'diversification_ratio': float(effective_n / num_holdings)
+        }
+
+    def get_dashboard(self, n: int = 10,
+                      records: Optional[Tuple[Tuple[str, ...], List[tuple]]] = None) -> Dict:
+        """
+        Compute summary, top holdings, concentration and diversification from
+        a single latest-holdings fetch, for views that show all of them at once.
+
+        Args:
+            n: Number of top holdings to include
+            records: Optional unfiltered latest holdings as (columns, rows), for
+                     callers that already fetched them; fetched when omitted
+
+        Returns:
+            Dictionary with 'summary', 'top_holdings' (DataFrame),
+            'concentration' and 'diversification'
+        """
+        if records is None:
+            records = self.db.get_latest_holdings(as_records=True)
+        df = _records_to_frame(records)
+
+        return {
+            'summary': self._summary_from_df(df),
+            'top_holdings': self._top_from_df(df, n),
+            'concentration': self._concentration_from_df(df),
+            'diversification': self._diversification_from_df(df)
+        }
+
+    @staticmethod
+    def _summary_from_df(df: pd.DataFrame) -> Dict:
+        """Portfolio summary from a latest-holdings frame, shaped like get_portfolio_summary."""
+        if df.empty:
+            return {
+                'total_value': 0,
+                'num_accounts': 0,
+                'num_securities': 0,
+                'num_institutions': 0
+            }
+
+        total_value = float(df['market_value'].sum())
+        total_book = float(df['book_value'].sum())
+
+        summary = {
+            'total_value': total_value,
+            'num_accounts': int(df[['institution_name', 'account_number']].drop_duplicates().shape[0]),
+            'num_securities': int(df['security_name'].nunique()),
+            'num_institutions': int(df['institution_name'].nunique()),
+            'total_gain_loss': float((df['market_value'] - df['book_value']).sum()),
+            'total_gain_loss_pct': float((total_value - total_book) / total_book * 100) if total_book > 0 else 0
+        }
+
+        # Breakdown by institution
+        by_institution = df.groupby('institution_name')
+        summary['by_institution'] = {
+            'market_value': by_institution['market_value'].sum(**_GROUPBY_ENGINE).to_dict(),
+            'security_name': by_institution['security_name'].nunique().to_dict()
         }
+
+        # Breakdown by asset category
+        summary['by_asset_category'] = {
+            'market_value': df.groupby('asset_category')['market_value'].sum(**_GROUPBY_ENGINE).to_dict()
+        }
+
+        return summary
+
+    @staticmethod
+    def _top_from_df(df: pd.DataFrame, n: int) -> pd.DataFrame:
+        """Top n holdings from a latest-holdings frame, shaped like get_top_holdings."""
+        if df.empty:
+            return df
+
+        top = df.nlargest(n, 'market_value').copy()
+        total_value = df['market_value'].sum()
+        top['portfolio_pct'] = (top['market_value'] / total_value * 100).round(2)
+
+        return top[['security_name', 'symbol', 'asset_category', 'quantity',
+                    'price', 'market_value', 'portfolio_pct', 'institution_name',
+                    'account_number']]
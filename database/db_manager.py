@@ -5,39 +5,114 @@ Handles all database operations including connections, inserts, and queries.
 
 import psycopg2
 from psycopg2 import pool, extras
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
+import re
+import threading
+import time
+import weakref
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Return NUMERIC/DECIMAL columns as float so result rows feed pandas as float64
+# without a per-cell Decimal conversion downstream.
+DEC2FLOAT = psycopg2.extensions.new_type(
+    psycopg2.extensions.DECIMAL.values,
+    'DEC2FLOAT',
+    lambda value, cursor: float(value) if value is not None else None
+)
+
+# Columns of v_latest_holdings, and the subset the analyzers read by default
+LATEST_HOLDINGS_VIEW_COLUMNS = (
+    'account_number', 'account_type', 'institution_name', 'statement_date',
+    'security_name', 'symbol', 'asset_category', 'asset_type_name', 'quantity',
+    'price', 'book_value', 'market_value', 'currency', 'gain_loss_pct'
+)
+LATEST_HOLDINGS_COLUMNS = (
+    'security_name', 'symbol', 'asset_category', 'quantity', 'price',
+    'market_value', 'book_value', 'institution_name', 'account_number'
+)
+
+# Statements that change data; any of these (even with RETURNING rows)
+# invalidates the read cache
+WRITE_STATEMENT = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|ALTER|DROP)\b', re.IGNORECASE)
+
+# Live managers, and caches built on their results (see register_dependent_cache).
+# A write through any manager in the process invalidates all of them, since
+# each component (web app, agents, scripts) holds its own manager.
+_managers: "weakref.WeakSet[DatabaseManager]" = weakref.WeakSet()
+_dependent_caches: weakref.WeakSet = weakref.WeakSet()
+
+
+def register_dependent_cache(cache) -> None:
+    """
+    Clear a cache whenever a database write invalidates the read caches.
+
+    Args:
+        cache: Any object with a clear() method; held by weak reference
+    """
+    _dependent_caches.add(cache)
+
+
+# Distinct (query, params) results kept by the read cache
+QUERY_CACHE_MAXSIZE = 32
+
+# Pooled connections idle longer than this are checked with SELECT 1 on checkout
+IDLE_PING_SECONDS = 60
+# Stale connections replaced per checkout before giving up
+STALE_CONNECTION_RETRIES = 2
+
 
 class DatabaseManager:
     """Manages database connections and operations."""
 
-    def __init__(self, db_config: Dict[str, str]):
+    def __init__(self, db_config: Dict[str, str], cache_ttl: float = 60.0,
+                 cache_maxsize: int = QUERY_CACHE_MAXSIZE):
         """
         Initialize database manager with configuration.
 
         Args:
             db_config: Dictionary with keys: host, database, user, password, port
+            cache_ttl: Seconds a cached read-view result stays valid. Writes made
+                       through any manager in this process invalidate the cache
+                       immediately; the
+                       TTL bounds staleness from writes made by other processes.
+                       Set to 0 to disable caching.
+            cache_maxsize: Maximum cached results; least recently used are evicted
         """
         self.db_config = db_config
         self.connection_pool = None
+        self.cache_ttl = cache_ttl
+        self.cache_maxsize = cache_maxsize
+        self._query_cache: "OrderedDict[Tuple, Tuple[float, tuple]]" = OrderedDict()
+        # Bumped by invalidate_cache so a read that overlapped a write is not stored
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
         self._init_connection_pool()
+        _managers.add(self)
 
     def _init_connection_pool(self):
         """Initialize the database connection pool."""
         try:
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                minconn=1,
-                maxconn=10,
+            # Threaded: one manager is shared by every request thread of the web app
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                minconn=self.db_config.get('min_connections', 4),
+                maxconn=self.db_config.get('max_connections', 10),
                 host=self.db_config['host'],
                 database=self.db_config['database'],
                 user=self.db_config['user'],
                 password=self.db_config['password'],
-                port=self.db_config.get('port', 5432)
+                port=self.db_config.get('port', 5432),
+                application_name='portfolio_analyzer',
+                keepalives=1,
+                keepalives_idle=30,
+                keepalives_interval=10,
+                keepalives_count=3,
+                options=f"-c statement_timeout={self.db_config.get('statement_timeout_ms', 30000)}"
             )
             logger.info("Database connection pool created successfully")
         except Exception as e:
@@ -45,11 +120,41 @@ class DatabaseManager:
             raise
 
     def get_connection(self):
-        """Get a connection from the pool."""
-        return self.connection_pool.getconn()
+        """Get a connection from the pool, replacing it if it went stale while idle."""
+        conn = self.connection_pool.getconn()
+        # The replacement for a stale connection may be another idle one, so
+        # it is checked the same way
+        for attempt in range(STALE_CONNECTION_RETRIES + 1):
+            last_used = self._last_used.get(id(conn))
+            if not conn.closed and not (last_used and time.monotonic() - last_used > IDLE_PING_SECONDS):
+                break
+            if self.ping(conn):
+                break
+            logger.warning("Discarding stale pooled connection")
+            self.connection_pool.putconn(conn, close=True)
+            self._last_used.pop(id(conn), None)
+            if attempt == STALE_CONNECTION_RETRIES:
+                raise psycopg2.OperationalError("No usable connection in the database pool")
+            conn = self.connection_pool.getconn()
+
+        psycopg2.extensions.register_type(DEC2FLOAT, conn)
+        return conn
+
+    def ping(self, conn) -> bool:
+        """Return True if the connection still answers SELECT 1."""
+        if conn.closed:
+            return False
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            return False
 
     def release_connection(self, conn):
         """Release a connection back to the pool."""
+        self._last_used[id(conn)] = time.monotonic()
         self.connection_pool.putconn(conn)
 
     def close_all_connections(self):
@@ -58,6 +163,55 @@ class DatabaseManager:
             self.connection_pool.closeall()
             logger.info("All database connections closed")
 
+    def invalidate_cache(self):
+        """Drop cached read results of every manager and every registered dependent cache."""
+        for manager in list(_managers):
+            manager._clear_query_cache()
+        for cache in list(_dependent_caches):
+            cache.clear()
+
+    def _clear_query_cache(self):
+        with self._cache_lock:
+            self._query_cache.clear()
+            self._cache_generation += 1
+
+    def _cached_query(self, query: str, params: Tuple = None, as_records: bool = False):
+        """
+        Run a read-only query, reusing a recent result for the same query and params.
+
+        Cached rows are shared between callers and must not be mutated.
+        """
+        if self.cache_ttl <= 0:
+            return self.execute_query(query, params, fetch=True, as_records=as_records)
+
+        key = (query, params, as_records)
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._query_cache.get(key)
+            if entry is not None:
+                if now - entry[0] < self.cache_ttl:
+                    self._query_cache.move_to_end(key)
+                else:
+                    del self._query_cache[key]
+                    entry = None
+            generation = self._cache_generation
+        if entry is not None:
+            return entry[1] if as_records else list(entry[1])
+
+        result = self.execute_query(query, params, fetch=True, as_records=as_records)
+        if as_records:
+            result = (result[0], tuple(result[1]))
+        else:
+            result = tuple(result)
+        with self._cache_lock:
+            # A write since the read started may not be reflected in the result
+            if generation == self._cache_generation:
+                self._query_cache[key] = (now, result)
+                self._query_cache.move_to_end(key)
+                while len(self._query_cache) > self.cache_maxsize:
+                    self._query_cache.popitem(last=False)
+        return result if as_records else list(result)
+
     def reset_data_tables(self, confirm: bool = False):
         """
         Reset all data tables (statements, holdings, cash_balances).
@@ -74,14 +228,10 @@ class DatabaseManager:
             logger.info("Resetting data tables...")
 
             # Delete in order respecting foreign key constraints
-            self.execute_query("DELETE FROM holdings")
-            logger.info("  - Cleared holdings table")
-
-            self.execute_query("DELETE FROM cash_balances")
-            logger.info("  - Cleared cash_balances table")
-
-            self.execute_query("DELETE FROM statements")
-            logger.info("  - Cleared statements table")
+            with self.transaction() as cursor:
+                for table in ('holdings', 'cash_balances', 'statements'):
+                    self.execute_query(f"DELETE FROM {table}", cursor=cursor)
+                    logger.info("  - Cleared %s table", table)
 
             logger.info("Data tables reset successfully")
             return True
@@ -106,26 +256,11 @@ class DatabaseManager:
             logger.info("Resetting ALL tables...")
 
             # Delete in order respecting foreign key constraints
-            self.execute_query("DELETE FROM holdings")
-            logger.info("  - Cleared holdings table")
-
-            self.execute_query("DELETE FROM cash_balances")
-            logger.info("  - Cleared cash_balances table")
-
-            self.execute_query("DELETE FROM statements")
-            logger.info("  - Cleared statements table")
-
-            self.execute_query("DELETE FROM securities")
-            logger.info("  - Cleared securities table")
-
-            self.execute_query("DELETE FROM asset_types")
-            logger.info("  - Cleared asset_types table")
-
-            self.execute_query("DELETE FROM accounts")
-            logger.info("  - Cleared accounts table")
-
-            self.execute_query("DELETE FROM institutions")
-            logger.info("  - Cleared institutions table")
+            with self.transaction() as cursor:
+                for table in ('holdings', 'cash_balances', 'statements', 'securities',
+                              'asset_types', 'accounts', 'institutions'):
+                    self.execute_query(f"DELETE FROM {table}", cursor=cursor)
+                    logger.info("  - Cleared %s table", table)
 
             logger.info("All tables reset successfully")
             return True
@@ -134,7 +269,8 @@ class DatabaseManager:
             logger.error(f"Error resetting all tables: {e}")
             raise
 
-    def execute_query(self, query: str, params: Tuple = None, fetch: bool = False):
+    def execute_query(self, query: str, params: Tuple = None, fetch: bool = False, cursor=None,
+                      as_records: bool = False):
         """
         Execute a SQL query.
 
@@ -142,18 +278,33 @@ class DatabaseManager:
             query: SQL query string
             params: Query parameters
             fetch: Whether to fetch results
+            cursor: Optional cursor from transaction(); when given the query runs
+                    on that connection and is committed with the transaction
+            as_records: Fetch plain tuples and return (columns, rows) instead of
+                        a list of dicts, for building DataFrames without per-row
+                        dict allocation (ignored when cursor is given)
 
         Returns:
             Query results if fetch=True, None otherwise
         """
+        if cursor is not None:
+            cursor.execute(query, params)
+            return cursor.fetchall() if fetch else None
+
         conn = self.get_connection()
         cursor = None
         try:
-            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor = conn.cursor() if as_records else conn.cursor(cursor_factory=extras.RealDictCursor)
             cursor.execute(query, params)
             conn.commit()
 
+            # Writes, including INSERT ... RETURNING, may leave cached reads stale
+            if not fetch or WRITE_STATEMENT.search(query):
+                self.invalidate_cache()
+
             if fetch:
+                if as_records:
+                    return tuple(col[0] for col in cursor.description), cursor.fetchall()
                 return cursor.fetchall()
             return None
 
@@ -167,7 +318,52 @@ class DatabaseManager:
                 cursor.close()
             self.release_connection(conn)
 
-    def get_or_create_institution(self, institution_name: str) -> int:
+    def execute_many(self, query: str, params_seq: List[Tuple], page_size: int = 500, cursor=None):
+        """
+        Execute a SQL statement for each parameter tuple using batched round trips.
+
+        Args:
+            query: SQL query string
+            params_seq: Sequence of parameter tuples
+            page_size: Number of statements sent per round trip
+            cursor: Optional cursor from transaction()
+        """
+        if not params_seq:
+            return
+
+        if cursor is not None:
+            extras.execute_batch(cursor, query, params_seq, page_size=page_size)
+            return
+
+        with self.transaction() as cur:
+            extras.execute_batch(cur, query, params_seq, page_size=page_size)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several statements on one pooled connection in a single transaction.
+
+        Yields:
+            RealDictCursor bound to the connection; committed on success,
+            rolled back on error.
+        """
+        conn = self.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            yield cursor
+            conn.commit()
+            self.invalidate_cache()
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error executing transaction: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            self.release_connection(conn)
+
+    def get_or_create_institution(self, institution_name: str, cursor=None) -> int:
         """Get or create institution and return its ID."""
         query = """
             INSERT INTO institutions (institution_name)
@@ -175,11 +371,11 @@ class DatabaseManager:
             ON CONFLICT (institution_name) DO UPDATE SET institution_name = EXCLUDED.institution_name
             RETURNING institution_id
         """
-        result = self.execute_query(query, (institution_name,), fetch=True)
+        result = self.execute_query(query, (institution_name,), fetch=True, cursor=cursor)
         return result[0]['institution_id']
 
     def get_or_create_account(self, institution_id: int, account_number: str,
-                              account_type: str, account_name: str = None) -> int:
+                              account_type: str, account_name: str = None, cursor=None) -> int:
         """Get or create account and return its ID."""
         query = """
             INSERT INTO accounts (institution_id, account_number, account_type, account_name)
@@ -188,7 +384,8 @@ class DatabaseManager:
             DO UPDATE SET account_type = EXCLUDED.account_type, account_name = EXCLUDED.account_name
             RETURNING account_id
         """
-        result = self.execute_query(query, (institution_id, account_number, account_type, account_name), fetch=True)
+        result = self.execute_query(query, (institution_id, account_number, account_type, account_name),
+                                    fetch=True, cursor=cursor)
         return result[0]['account_id']
 
     def get_or_create_asset_type(self, asset_type_name: str, asset_category: str) -> int:
@@ -242,7 +439,7 @@ class DatabaseManager:
 
     def create_statement(self, account_id: int, statement_date: datetime,
                         period_start: datetime = None, period_end: datetime = None,
-                        total_value: float = None, file_path: str = None) -> int:
+                        total_value: float = None, file_path: str = None, cursor=None) -> int:
         """Create a statement record and return its ID."""
         query = """
             INSERT INTO statements (account_id, statement_date, statement_period_start,
@@ -259,7 +456,8 @@ class DatabaseManager:
         result = self.execute_query(
             query,
             (account_id, statement_date, period_start, period_end, total_value, file_path),
-            fetch=True
+            fetch=True,
+            cursor=cursor
         )
         return result[0]['statement_id']
 
@@ -287,16 +485,232 @@ class DatabaseManager:
              market_value, holding_date, currency)
         )
 
+    def bulk_upsert_returning(self, cursor, table: str, columns: List[str], rows: List[Tuple],
+                              conflict_columns: List[str], update_columns: List[str],
+                              id_column: str, page_size: int = 1000) -> Dict[Tuple, int]:
+        """
+        Upsert rows into a reference table with execute_values and return their IDs.
+
+        Rows sharing a conflict key are collapsed (last one wins), since
+        ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+
+        Args:
+            cursor: Cursor from transaction()
+            table: Table name
+            columns: Column names matching each row tuple
+            rows: Row tuples to upsert
+            conflict_columns: Columns of the unique constraint
+            update_columns: Columns overwritten from EXCLUDED on conflict
+            id_column: Primary key column to return
+            page_size: Rows sent per round trip
+
+        Returns:
+            Mapping of conflict-column value tuple to id
+        """
+        if not rows:
+            return {}
+
+        key_idx = [columns.index(col) for col in conflict_columns]
+        unique_rows = list({tuple(row[i] for i in key_idx): row for row in rows}.values())
+
+        updates = ', '.join(f"{col} = EXCLUDED.{col}" for col in update_columns)
+        query = f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES %s
+            ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET {updates}
+            RETURNING {id_column}, {', '.join(conflict_columns)}
+        """
+        result = extras.execute_values(cursor, query, unique_rows, page_size=page_size, fetch=True)
+        return {tuple(row[col] for col in conflict_columns): row[id_column] for row in result}
+
+    def bulk_upsert_asset_types(self, cursor, asset_types: Dict[str, str]) -> Dict[str, int]:
+        """
+        Upsert asset types in one round trip.
+
+        Args:
+            cursor: Cursor from transaction()
+            asset_types: Mapping of asset_type_name to asset_category
+
+        Returns:
+            Mapping of asset_type_name to asset_type_id
+        """
+        ids = self.bulk_upsert_returning(
+            cursor, 'asset_types', ['asset_type_name', 'asset_category'],
+            list(asset_types.items()), ['asset_type_name'], ['asset_category'], 'asset_type_id'
+        )
+        return {key[0]: asset_type_id for key, asset_type_id in ids.items()}
+
+    def bulk_upsert_securities(self, cursor,
+                               securities: List[Tuple[Optional[str], str, int]]) -> List[int]:
+        """
+        Resolve securities to IDs with the same matching rules as
+        get_or_create_security, using one lookup, one update and one insert.
+
+        Args:
+            cursor: Cursor from transaction()
+            securities: List of (symbol, security_name, asset_type_id), in holding order
+
+        Returns:
+            List of security IDs aligned with the input list
+        """
+        if not securities:
+            return []
+
+        names = list({name for _, name, _ in securities})
+        cursor.execute(
+            "SELECT security_id, symbol, security_name FROM securities WHERE security_name = ANY(%s)",
+            (names,)
+        )
+        # security_name -> list of [security_id, symbol]; new rows use a negative placeholder id
+        known: Dict[str, List[list]] = {}
+        for row in cursor.fetchall():
+            known.setdefault(row['security_name'], []).append([row['security_id'], row['symbol']])
+
+        updates: Dict[int, Tuple[Optional[str], int]] = {}
+        inserts: Dict[str, list] = {}
+        resolved = []
+
+        for symbol, name, asset_type_id in securities:
+            rows = known.get(name, [])
+            match = next((r for r in rows if symbol and r[1] == symbol), None)
+            if match:
+                resolved.append(match[0])
+                continue
+
+            if rows:
+                # Name-only match: adopt the new symbol and classification
+                match = rows[0]
+                match[1] = symbol
+                if match[0] < 0:
+                    inserts[name][0] = symbol
+                    inserts[name][2] = asset_type_id
+                else:
+                    updates[match[0]] = (symbol, asset_type_id)
+                resolved.append(match[0])
+                continue
+
+            placeholder = -(len(inserts) + 1)
+            inserts[name] = [symbol, name, asset_type_id, None]
+            known[name] = [[placeholder, symbol]]
+            resolved.append(placeholder)
+
+        if updates:
+            extras.execute_values(
+                cursor,
+                """
+                UPDATE securities AS s
+                SET symbol = v.symbol, asset_type_id = v.asset_type_id, description = v.description
+                FROM (VALUES %s) AS v(security_id, symbol, asset_type_id, description)
+                WHERE s.security_id = v.security_id
+                """,
+                [(security_id, symbol, asset_type_id, None)
+                 for security_id, (symbol, asset_type_id) in updates.items()],
+                template="(%s::integer, %s::varchar, %s::integer, %s::text)"
+            )
+
+        new_ids = {}
+        if inserts:
+            rows = extras.execute_values(
+                cursor,
+                """
+                INSERT INTO securities (symbol, security_name, asset_type_id, description)
+                VALUES %s
+                RETURNING security_id, security_name
+                """,
+                [tuple(values) for values in inserts.values()],
+                fetch=True
+            )
+            by_name = {row['security_name']: row['security_id'] for row in rows}
+            new_ids = {known[name][0][0]: by_name[name] for name in inserts}
+
+        return [new_ids.get(security_id, security_id) for security_id in resolved]
+
+    def bulk_create_holdings(self, cursor, rows: List[Tuple], page_size: int = 10000):
+        """
+        Upsert holding records in as few round trips as possible.
+
+        Args:
+            cursor: Cursor from transaction()
+            rows: List of (statement_id, account_id, security_id, quantity, price,
+                  book_value, market_value, holding_date, currency) tuples
+            page_size: Rows sent per INSERT statement
+        """
+        if not rows:
+            return
+
+        # ON CONFLICT cannot touch the same row twice in one statement; keep the last one
+        unique_rows = list({(row[0], row[2]): row for row in rows}.values())
+
+        query = """
+            INSERT INTO holdings (statement_id, account_id, security_id, quantity, price,
+                                 book_value, market_value, holding_date, currency)
+            VALUES %s
+            ON CONFLICT (statement_id, security_id)
+            DO UPDATE SET
+                quantity = EXCLUDED.quantity,
+                price = EXCLUDED.price,
+                book_value = EXCLUDED.book_value,
+                market_value = EXCLUDED.market_value,
+                holding_date = EXCLUDED.holding_date,
+                currency = EXCLUDED.currency
+        """
+        extras.execute_values(cursor, query, unique_rows, page_size=page_size)
+
+    def bulk_create_statements(self, cursor, rows: List[Tuple]) -> List[int]:
+        """
+        Upsert statement records in one round trip.
+
+        Args:
+            cursor: Cursor from transaction()
+            rows: List of (account_id, statement_date, period_start, period_end,
+                  total_value, file_path) tuples
+
+        Returns:
+            List of statement IDs aligned with the input list
+        """
+        # statement_date is a DATE column; key on dates so RETURNING rows match up
+        rows = [
+            (row[0], row[1].date() if isinstance(row[1], datetime) else row[1]) + tuple(row[2:])
+            for row in rows
+        ]
+        ids = self.bulk_upsert_returning(
+            cursor, 'statements',
+            ['account_id', 'statement_date', 'statement_period_start',
+             'statement_period_end', 'total_value', 'file_path'],
+            rows, ['account_id', 'statement_date'],
+            ['statement_period_start', 'statement_period_end', 'total_value', 'file_path'],
+            'statement_id'
+        )
+        return [ids[(row[0], row[1])] for row in rows]
+
+    def bulk_create_cash_balances(self, cursor, rows: List[Tuple]):
+        """
+        Insert cash balance records in one round trip.
+
+        Args:
+            cursor: Cursor from transaction()
+            rows: List of (statement_id, account_id, balance_date, cash_amount, currency) tuples
+        """
+        if not rows:
+            return
+
+        query = """
+            INSERT INTO cash_balances (statement_id, account_id, balance_date, cash_amount, currency)
+            VALUES %s
+            ON CONFLICT DO NOTHING
+        """
+        extras.execute_values(cursor, query, rows, page_size=1000)
+
     def create_cash_balance(self, statement_id: int, account_id: int,
                            balance_date: datetime, cash_amount: float,
-                           currency: str = 'CAD'):
+                           currency: str = 'CAD', cursor=None):
         """Create a cash balance record."""
         query = """
             INSERT INTO cash_balances (statement_id, account_id, balance_date, cash_amount, currency)
             VALUES (%s, %s, %s, %s, %s)
             ON CONFLICT DO NOTHING
         """
-        self.execute_query(query, (statement_id, account_id, balance_date, cash_amount, currency))
+        self.execute_query(query, (statement_id, account_id, balance_date, cash_amount, currency), cursor=cursor)
 
     def save_statement_data(self, statement_data: Dict):
         """
@@ -305,74 +719,134 @@ class DatabaseManager:
         Args:
             statement_data: Dictionary containing parsed statement data
         """
+        self.save_statements_data([statement_data])
+
+    def save_statements_data(self, statements: List[Dict], cursor=None):
+        """
+        Save several parsed statements in one transaction.
+
+        Reference rows (institutions, accounts, asset types, securities) for
+        the whole batch are upserted once per table, and statements, cash
+        balances and holdings are each written with execute_values.
+
+        Args:
+            statements: List of dictionaries containing parsed statement data
+            cursor: Optional cursor from transaction(); when given the batch is
+                    written on that connection and committed with the transaction
+        """
+        if not statements:
+            return
+
         try:
-            # Get or create institution
-            institution_id = self.get_or_create_institution(statement_data['institution'])
-
-            # Get or create account
-            account_id = self.get_or_create_account(
-                institution_id,
-                statement_data['account_number'],
-                statement_data.get('account_type', 'Unknown'),
-                statement_data.get('account_name')
-            )
+            if cursor is not None:
+                self._save_statements(cursor, statements)
+            else:
+                with self.transaction() as cursor:
+                    self._save_statements(cursor, statements)
 
-            # Create statement
-            statement_id = self.create_statement(
-                account_id,
-                statement_data['statement_date'],
-                statement_data.get('period_start'),
-                statement_data.get('period_end'),
-                statement_data.get('total_value'),
-                statement_data.get('file_path')
-            )
+            for data in statements:
+                logger.info("Successfully saved statement data for account %s", data['account_number'])
 
-            # Save cash balance if present
-            if statement_data.get('cash_balance') and statement_data.get('cash_balance') > 0:
-                self.create_cash_balance(
-                    statement_id,
-                    account_id,
-                    statement_data['statement_date'],
-                    statement_data['cash_balance']
-                )
+        except Exception as e:
+            logger.error(f"Error saving statement data: {e}")
+            raise
 
-            # Save holdings
-            for holding in statement_data.get('holdings', []):
-                # Get or create asset type
-                asset_type_id = self.get_or_create_asset_type(
-                    holding['asset_type'],
-                    holding['asset_category']
-                )
+    def _save_statements(self, cursor, statements: List[Dict]):
+        """Write a batch of statements on the given cursor."""
+        institution_ids = self.bulk_upsert_returning(
+            cursor, 'institutions', ['institution_name'],
+            [(data['institution'],) for data in statements],
+            ['institution_name'], ['institution_name'], 'institution_id'
+        )
 
-                # Get or create security
-                security_id = self.get_or_create_security(
-                    holding.get('symbol'),
-                    holding['security_name'],
-                    asset_type_id
+        account_ids = self.bulk_upsert_returning(
+            cursor, 'accounts',
+            ['institution_id', 'account_number', 'account_type', 'account_name'],
+            [
+                (
+                    institution_ids[(data['institution'],)],
+                    data['account_number'],
+                    data.get('account_type', 'Unknown'),
+                    data.get('account_name')
                 )
+                for data in statements
+            ],
+            ['institution_id', 'account_number'], ['account_type', 'account_name'], 'account_id'
+        )
 
-                # Create holding
-                self.create_holding(
+        all_holdings = [h for data in statements for h in data.get('holdings', [])]
+        asset_type_ids = self.bulk_upsert_asset_types(
+            cursor, {h['asset_type']: h['asset_category'] for h in all_holdings}
+        )
+        security_ids = iter(self.bulk_upsert_securities(cursor, [
+            (h.get('symbol'), h['security_name'], asset_type_ids[h['asset_type']])
+            for h in all_holdings
+        ]))
+
+        statement_account_ids = [
+            account_ids[(institution_ids[(data['institution'],)], data['account_number'])]
+            for data in statements
+        ]
+        statement_ids = self.bulk_create_statements(cursor, [
+            (
+                account_id,
+                data['statement_date'],
+                data.get('period_start'),
+                data.get('period_end'),
+                data.get('total_value'),
+                data.get('file_path')
+            )
+            for account_id, data in zip(statement_account_ids, statements)
+        ])
+
+        # Save cash balances if present
+        self.bulk_create_cash_balances(cursor, [
+            (statement_id, account_id, data['statement_date'], data['cash_balance'], 'CAD')
+            for statement_id, account_id, data in zip(statement_ids, statement_account_ids, statements)
+            if data.get('cash_balance') and data.get('cash_balance') > 0
+        ])
+
+        holding_rows = []
+        for statement_id, account_id, data in zip(statement_ids, statement_account_ids, statements):
+            for h in data.get('holdings', []):
+                holding_rows.append((
                     statement_id,
                     account_id,
-                    security_id,
-                    holding['quantity'],
-                    holding['price'],
-                    holding.get('book_value'),
-                    holding.get('market_value'),
-                    statement_data['statement_date'],
-                    holding.get('currency', 'CAD')
-                )
+                    next(security_ids),
+                    h['quantity'],
+                    h['price'],
+                    h.get('book_value'),
+                    h.get('market_value'),
+                    data['statement_date'],
+                    h.get('currency', 'CAD')
+                ))
+
+        self.bulk_create_holdings(cursor, holding_rows)
+
+    def get_latest_holdings(self, institution: str = None, account_number: str = None,
+                            as_records: bool = False,
+                            columns: Optional[Tuple[str, ...]] = LATEST_HOLDINGS_COLUMNS) -> List[Dict]:
+        """
+        Get latest holdings, optionally filtered by institution and account.
 
-            logger.info(f"Successfully saved statement data for account {statement_data['account_number']}")
+        Args:
+            institution: Optional institution filter
+            account_number: Optional account number filter
+            as_records: Return (columns, rows) of plain tuples instead of dicts
+            columns: v_latest_holdings columns to select; None selects all
 
-        except Exception as e:
-            logger.error(f"Error saving statement data: {e}")
-            raise
+        Returns:
+            List of holding rows
+        """
+        if columns is None:
+            select_list = "*"
+        else:
+            unknown = set(columns) - set(LATEST_HOLDINGS_VIEW_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown v_latest_holdings columns: {sorted(unknown)}")
+            select_list = ", ".join(columns)
 
-    def get_latest_holdings(self, institution: str = None, account_number: str = None) -> List[Dict]:
-        """Get latest holdings, optionally filtered by institution and account."""
-        query = "SELECT * FROM v_latest_holdings WHERE 1=1"
+        query = f"SELECT {select_list} FROM v_latest_holdings WHERE 1=1"
         params = []
 
         if institution:
@@ -385,27 +859,163 @@ class DatabaseManager:
 
         query += " ORDER BY institution_name, account_number, market_value DESC"
 
-        return self.execute_query(query, tuple(params) if params else None, fetch=True)
+        return self._cached_query(query, tuple(params) if params else None, as_records)
+
+    def get_holdings_for_account(self, institution: str, account_number: str,
+                                 as_records: bool = False) -> List[Dict]:
+        """
+        Get the latest holdings of a single account.
+
+        Returns the same columns as v_latest_holdings, but looks up only this
+        account's latest statement (LATERAL ... LIMIT 1) instead of filtering
+        the view after it has joined every account.
+        """
+        query = """
+            SELECT
+                a.account_number,
+                a.account_type,
+                i.institution_name,
+                s.statement_date,
+                sec.security_name,
+                sec.symbol,
+                at.asset_category,
+                at.asset_type_name,
+                h.quantity,
+                h.price,
+                h.book_value,
+                h.market_value,
+                h.currency,
+                CASE
+                    WHEN h.book_value > 0 THEN ((h.market_value - h.book_value) / h.book_value * 100)
+                    ELSE 0
+                END as gain_loss_pct
+            FROM institutions i
+            JOIN accounts a ON a.institution_id = i.institution_id
+            JOIN LATERAL (
+                SELECT s.statement_id, s.statement_date
+                FROM statements s
+                WHERE s.account_id = a.account_id
+                ORDER BY s.statement_date DESC
+                LIMIT 1
+            ) s ON TRUE
+            JOIN holdings h ON h.statement_id = s.statement_id
+            JOIN securities sec ON h.security_id = sec.security_id
+            JOIN asset_types at ON sec.asset_type_id = at.asset_type_id
+            WHERE i.institution_name = %s AND a.account_number = %s
+            ORDER BY h.market_value DESC
+        """
+        return self._cached_query(query, (institution, account_number), as_records)
+
+    def get_top_holdings(self, n: int = 10, as_records: bool = False) -> List[Dict]:
+        """
+        Get the n largest latest holdings by market value, with each holding's
+        percentage of the total portfolio value.
+        """
+        query = """
+            SELECT
+                security_name,
+                symbol,
+                asset_category,
+                quantity,
+                price,
+                market_value,
+                ROUND(market_value * 100 / NULLIF(SUM(market_value) OVER (), 0), 2) AS portfolio_pct,
+                institution_name,
+                account_number
+            FROM v_latest_holdings
+            ORDER BY market_value DESC NULLS LAST
+            LIMIT %s
+        """
+        return self._cached_query(query, (n,), as_records)
+
+    def get_portfolio_summary_agg(self) -> List[Dict]:
+        """
+        Get portfolio summary aggregates computed in the database.
 
-    def get_portfolio_allocation(self, as_of_date: datetime = None) -> List[Dict]:
-        """Get portfolio allocation by asset category."""
-        query = "SELECT * FROM v_portfolio_allocation"
+        Returns one 'total' row plus one row per institution ('institution')
+        and per asset category ('category'), distinguished by the 'kind' column.
+        """
+        query = """
+            WITH totals AS (
+                SELECT
+                    'total'::text AS kind,
+                    NULL::text AS label,
+                    SUM(market_value) AS market_value,
+                    SUM(book_value) AS book_value,
+                    SUM(market_value - book_value) AS gain_loss,
+                    COUNT(DISTINCT security_name) AS num_securities,
+                    COUNT(DISTINCT institution_name) AS num_institutions,
+                    COUNT(DISTINCT (institution_name, account_number)) AS num_accounts
+                FROM v_latest_holdings
+            ),
+            by_institution AS (
+                SELECT
+                    'institution'::text AS kind,
+                    institution_name::text AS label,
+                    SUM(market_value) AS market_value,
+                    NULL::numeric AS book_value,
+                    NULL::numeric AS gain_loss,
+                    COUNT(DISTINCT security_name) AS num_securities,
+                    NULL::bigint AS num_institutions,
+                    NULL::bigint AS num_accounts
+                FROM v_latest_holdings
+                GROUP BY institution_name
+            ),
+            by_category AS (
+                SELECT
+                    'category'::text AS kind,
+                    asset_category::text AS label,
+                    SUM(market_value) AS market_value,
+                    NULL::numeric AS book_value,
+                    NULL::numeric AS gain_loss,
+                    NULL::bigint AS num_securities,
+                    NULL::bigint AS num_institutions,
+                    NULL::bigint AS num_accounts
+                FROM v_latest_holdings
+                GROUP BY asset_category
+            )
+            SELECT * FROM totals
+            UNION ALL SELECT * FROM by_institution
+            UNION ALL SELECT * FROM by_category
+        """
+        return self._cached_query(query)
+
+    def get_portfolio_allocation(self, as_of_date: datetime = None, institution: str = None,
+                                 as_records: bool = False) -> List[Dict]:
+        """
+        Get portfolio allocation by asset category, with each category's
+        percentage of its account's total value.
+
+        Rows are dicts, or (columns, rows) of plain tuples when as_records=True.
+        """
+        query = """
+            SELECT *,
+                ROUND(total_value * 100 /
+                      NULLIF(SUM(total_value) OVER (PARTITION BY institution_name, account_number), 0), 2)
+                    AS percentage
+            FROM v_portfolio_allocation
+        """
+        params = []
 
         if as_of_date:
             query += " WHERE statement_date = %s"
-            params = (as_of_date,)
+            params.append(as_of_date)
         else:
             query += " WHERE statement_date = (SELECT MAX(statement_date) FROM statements)"
-            params = None
+
+        if institution:
+            query += " AND institution_name = %s"
+            params.append(institution)
 
         query += " ORDER BY institution_name, account_number, asset_category"
 
-        return self.execute_query(query, params, fetch=True)
+        return self._cached_query(query, tuple(params) if params else None, as_records)
 
     def get_portfolio_value_trend(self, institution: str = None,
                                  start_date: datetime = None,
                                  end_date: datetime = None,
-                                 monthly: bool = True) -> List[Dict]:
+                                 monthly: bool = True,
+                                 as_records: bool = False) -> List[Dict]:
         """
         Get portfolio value over time.
 
@@ -416,6 +1026,7 @@ class DatabaseManager:
             monthly: If True, aggregates by month (recommended to avoid dips
                     when accounts have statements on different days).
                     If False, returns exact statement dates.
+            as_records: Return (columns, rows) of plain tuples instead of dicts
 
         Returns:
             List of dictionaries with portfolio value data
@@ -440,4 +1051,4 @@ class DatabaseManager:
 
         query += " ORDER BY statement_date, institution_name, account_number"
 
-        return self.execute_query(query, tuple(params) if params else None, fetch=True)
+        return self._cached_query(query, tuple(params) if params else None, as_records)
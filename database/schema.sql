@@ -106,6 +106,13 @@ CREATE INDEX idx_statements_date ON statements(statement_date);
 CREATE INDEX idx_accounts_institution ON accounts(institution_id);
 CREATE INDEX idx_cash_balances_account_date ON cash_balances(account_id, balance_date);
 
+-- Latest-statement lookups (DISTINCT ON account_id ORDER BY statement_date DESC)
+-- and holdings-by-statement joins can be answered from these indexes alone
+CREATE INDEX IF NOT EXISTS idx_statements_date_account
+    ON statements(account_id, statement_date DESC) INCLUDE (statement_id, total_value);
+CREATE INDEX IF NOT EXISTS idx_holdings_statement
+    ON holdings(statement_id) INCLUDE (security_id, market_value, book_value, quantity, price);
+
 -- Views for common queries
 
 -- View: Latest holdings by account
@@ -128,17 +135,17 @@ SELECT
         WHEN h.book_value > 0 THEN ((h.market_value - h.book_value) / h.book_value * 100)
         ELSE 0
     END as gain_loss_pct
-FROM holdings h
-JOIN statements s ON h.statement_id = s.statement_id
+FROM (
+    -- Latest statement per account
+    SELECT DISTINCT ON (account_id) statement_id, account_id, statement_date
+    FROM statements
+    ORDER BY account_id, statement_date DESC
+) s
+JOIN holdings h ON h.statement_id = s.statement_id
 JOIN accounts a ON h.account_id = a.account_id
 JOIN institutions i ON a.institution_id = i.institution_id
 JOIN securities sec ON h.security_id = sec.security_id
-JOIN asset_types at ON sec.asset_type_id = at.asset_type_id
-WHERE s.statement_date = (
-    SELECT MAX(s2.statement_date)
-    FROM statements s2
-    WHERE s2.account_id = a.account_id
-);
+JOIN asset_types at ON sec.asset_type_id = at.asset_type_id;
 
 -- View: Portfolio allocation by asset category
 CREATE OR REPLACE VIEW v_portfolio_allocation AS
@@ -14,27 +14,37 @@ def fix_asset_types():
 
     print("Checking asset_types for issues...")
 
-    # Check current Stock classification
-    query = "SELECT * FROM asset_types WHERE asset_type_name = 'Stock'"
-    result = db.execute_query(query, fetch=True)
-
-    if result and result[0]['asset_category'] != 'Equity':
-        print(f"Found issue: Stock is classified as '{result[0]['asset_category']}' instead of 'Equity'")
-        print("Fixing...")
-
-        # Use get_or_create_asset_type which has ON CONFLICT UPDATE logic
-        asset_type_id = db.get_or_create_asset_type('Stock', 'Equity')
-        print(f"✓ Updated Stock (ID: {asset_type_id}) to Equity category")
+    # Upsert Stock as Equity and read back the old and new category in one round trip
+    query = """
+        WITH previous AS (
+            SELECT asset_category FROM asset_types WHERE asset_type_name = 'Stock'
+        )
+        INSERT INTO asset_types (asset_type_name, asset_category)
+        VALUES ('Stock', 'Equity')
+        ON CONFLICT (asset_type_name)
+        DO UPDATE SET asset_category = EXCLUDED.asset_category
+        RETURNING asset_type_id, asset_category,
+                  (SELECT asset_category FROM previous) AS previous_category
+    """
+    result = db.execute_query(query, fetch=True)[0]
+
+    if result['previous_category'] == 'Equity':
+        print("✓ Stock is already correctly classified as Equity")
+    else:
+        if result['previous_category'] is None:
+            # No Stock row existed; the upsert inserted one
+            print("Found issue: Stock asset type did not exist")
+            print(f"✓ Created Stock (ID: {result['asset_type_id']}) with Equity category")
+        else:
+            print(f"Found issue: Stock was classified as '{result['previous_category']}' instead of 'Equity'")
+            print(f"✓ Updated Stock (ID: {result['asset_type_id']}) to Equity category")
 
         # Verify the fix
-        result = db.execute_query(query, fetch=True)
-        if result[0]['asset_category'] == 'Equity':
+        if result['asset_category'] == 'Equity':
             print("✓ Verification successful - Stock is now Equity")
         else:
-            print("✗ Verification failed - Stock is still", result[0]['asset_category'])
+            print("✗ Verification failed - Stock is still", result['asset_category'])
             return False
-    else:
-        print("✓ Stock is already correctly classified as Equity")
 
     print("\nAsset type check complete!")
     db.close_all_connections()
@@ -10,13 +10,19 @@ Usage:
 """
 
 import argparse
-import random
+import math
+import os
+import queue
 import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Tuple
 import logging
 
+import numpy as np
+
 from database.db_manager import DatabaseManager
 from config import DB_CONFIG
 
@@ -81,6 +87,17 @@ SECURITIES_POOL = {
     ],
 }
 
+# Column-oriented copy of SECURITIES_POOL so price math runs over whole arrays
+POOL_ARRAYS = {
+    asset_type: {
+        'base': np.array([s['base_price'] for s in securities], dtype=np.float64),
+        'vol': np.array([s['volatility'] for s in securities], dtype=np.float64),
+        'names': [s['name'] for s in securities],
+        'symbols': [s['symbol'] for s in securities],
+    }
+    for asset_type, securities in SECURITIES_POOL.items()
+}
+
 
 # Asset type classifications
 ASSET_TYPE_MAPPING = {
@@ -181,6 +198,13 @@ ACCOUNT_CONFIGS = [
 ]
 
 
+# Statements buffered by the background writer before each batched save
+WRITE_BATCH_SIZE = 500
+
+# Base RNG seed; each account's worker uses SEED + its index in ACCOUNT_CONFIGS
+SEED = 42
+
+
 # ============================================================================
 # DATA GENERATION FUNCTIONS
 # ============================================================================
@@ -188,10 +212,12 @@ ACCOUNT_CONFIGS = [
 class SyntheticDataGenerator:
     """Generates synthetic financial portfolio data."""
 
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, seed: int = SEED):
         self.db = db_manager
         self.start_date = datetime.now() - timedelta(days=730)  # 2 years ago
-        self.random = random.Random(42)  # Seed for reproducibility
+        self.rng = np.random.default_rng(seed)  # Seed for reproducibility; used for all draws
+        self.price_cache: Dict[str, Dict[datetime, float]] = {}  # security name -> date -> price
+        self._securities_cache: Dict[str, List[Tuple[str, Dict]]] = {}  # account number -> selection
 
     def generate_price_for_date(self, security: Dict, base_date: datetime,
                                 current_date: datetime) -> float:
@@ -206,6 +232,15 @@ class SyntheticDataGenerator:
         Returns:
             Price as float
         """
+        # GICs don't change price, so skip the random draw entirely
+        if security.get('volatility', 0) == 0:
+            return security['base_price']
+
+        if base_date == self.start_date:
+            cached = self.price_cache.get(security['name'], {}).get(current_date)
+            if cached is not None:
+                return cached
+
         days_elapsed = (current_date - base_date).days
         if days_elapsed <= 0:
             return security['base_price']
@@ -216,26 +251,57 @@ class SyntheticDataGenerator:
         volatility = security['volatility']
         drift = 0.08 / 365  # 8% annual return, daily
 
-        # Generate random walk
-        daily_returns = []
-        for _ in range(days_elapsed):
-            random_shock = self.random.gauss(0, 1)
-            daily_return = drift + volatility * random_shock / (365 ** 0.5)
-            daily_returns.append(daily_return)
-
-        # Calculate cumulative return
-        cumulative_return = sum(daily_returns)
+        # The sum of n independent N(0, 1) daily shocks is distributed N(0, sqrt(n)),
+        # so the whole random walk needs a single draw
+        shock_sum = self.rng.normal(0.0, math.sqrt(days_elapsed))
+        cumulative_return = drift * days_elapsed + volatility * shock_sum / math.sqrt(365)
         price = base_price * (1 + cumulative_return)
 
-        # GICs don't change price
-        if security.get('volatility', 0) == 0:
-            price = base_price
-
         return round(max(price, 0.01), 4)  # Ensure positive price
 
+    def precompute_prices(self, statement_dates: List[datetime], days_elapsed: np.ndarray = None):
+        """
+        Build one price path per security across all statement dates, shared
+        by every account that holds the security.
+
+        Brownian increments between consecutive dates are drawn in one
+        vectorized call per asset type (all securities x all dates) from
+        POOL_ARRAYS and accumulated, so each date's price has the same
+        distribution as generate_price_for_date and prices along a path are
+        consistent with each other.
+
+        Args:
+            statement_dates: Statement dates in ascending order
+            days_elapsed: Days from the start date to each statement date
+                (computed from statement_dates when omitted)
+        """
+        if days_elapsed is None:
+            days_elapsed = [(d - self.start_date).days for d in statement_dates]
+        days = np.asarray(days_elapsed, dtype=np.float64)
+        elapsed = np.maximum(days, 0.0)
+        steps = np.diff(elapsed, prepend=0.0)
+        drift = 0.08 / 365  # 8% annual return, daily
+
+        for pool in POOL_ARRAYS.values():
+            base = pool['base'][:, None]
+            vol = pool['vol'][:, None]
+
+            if not vol.any():
+                # GICs don't change price; no random draws needed
+                prices = np.broadcast_to(base, (len(base), len(steps)))
+            else:
+                # One (securities x dates) matrix of cumulative shocks per asset type
+                shocks = np.cumsum(self.rng.normal(0.0, np.sqrt(steps), size=(len(base), len(steps))), axis=1)
+                prices = np.maximum(base * (1 + drift * elapsed + vol * shocks / math.sqrt(365)), 0.01)
+                prices = np.where(vol == 0, base, prices)
+
+            for name, row in zip(pool['names'], np.round(prices, 4).tolist()):
+                self.price_cache[name] = dict(zip(statement_dates, row))
+
     def select_securities_for_account(self, account_config: Dict) -> List[Tuple[str, Dict]]:
         """
-        Select securities for an account based on allocation.
+        Select securities for an account based on allocation. The selection is
+        made once per account and reused for every statement.
 
         Args:
             account_config: Account configuration dictionary
@@ -243,140 +309,158 @@ class SyntheticDataGenerator:
         Returns:
             List of tuples (asset_type, security)
         """
+        cached = self._securities_cache.get(account_config['account_number'])
+        if cached is not None:
+            return cached
+
         selected = []
         allocation = account_config['allocation']
 
         for asset_type, weight in allocation.items():
             if weight > 0:
-                # Determine how many securities of this type
+                # Determine how many securities of this type (inclusive bounds)
                 if asset_type == 'GIC':
-                    num_securities = self.random.randint(1, 2)
+                    low, high = 1, 2
                 elif asset_type == 'Bond':
-                    num_securities = self.random.randint(1, 3)
+                    low, high = 1, 3
                 elif asset_type == 'Mutual Fund':
-                    num_securities = self.random.randint(2, 4)
+                    low, high = 2, 4
                 elif asset_type == 'ETF':
-                    num_securities = self.random.randint(3, 6)
+                    low, high = 3, 6
                 else:  # Stock
-                    num_securities = self.random.randint(4, 8)
+                    low, high = 4, 8
+                num_securities = int(self.rng.integers(low, high + 1))
 
                 # Select random securities from pool
                 pool = SECURITIES_POOL.get(asset_type, [])
                 if pool:
-                    selected_securities = self.random.sample(
-                        pool,
-                        min(num_securities, len(pool))
-                    )
-                    for sec in selected_securities:
-                        selected.append((asset_type, sec))
+                    indices = self.rng.choice(len(pool), size=min(num_securities, len(pool)), replace=False)
+                    selected.extend((asset_type, pool[i]) for i in indices)
 
+        # Holdings stay the same across an account's statements
+        self._securities_cache[account_config['account_number']] = selected
         return selected
 
-    def calculate_quantity(self, target_value: float, price: float,
-                          allocation_weight: float, num_positions: int) -> float:
+    def calculate_quantity(self, target_value: float, price: np.ndarray,
+                          allocation_weight: np.ndarray, num_positions: np.ndarray) -> np.ndarray:
         """
-        Calculate quantity of shares/units to purchase.
+        Calculate quantity of shares/units to purchase. Works element-wise on
+        arrays of positions (scalars are accepted too).
 
         Args:
             target_value: Total account target value
-            price: Security price
-            allocation_weight: Weight of this asset type (0-1)
-            num_positions: Number of positions in this asset type
+            price: Security price(s)
+            allocation_weight: Weight of each position's asset type (0-1)
+            num_positions: Number of positions in each position's asset type
 
         Returns:
-            Quantity as float
+            Quantities as a float array
         """
-        position_value = (target_value * allocation_weight) / num_positions
+        price = np.asarray(price, dtype=np.float64)
+        position_value = (target_value * np.asarray(allocation_weight)) / np.asarray(num_positions)
         quantity = position_value / price
 
-        # Round based on security type
-        if price > 1000:  # GICs
-            quantity = round(quantity, 0)
-        elif price > 100:
-            quantity = round(quantity, 2)
-        else:
-            quantity = round(quantity, 3)
+        # Round based on security type: whole units for GICs, then 2 or 3 decimals
+        quantity = np.where(
+            price > 1000, np.round(quantity, 0),
+            np.where(price > 100, np.round(quantity, 2), np.round(quantity, 3))
+        )
 
-        return max(quantity, 0.001)
+        return np.maximum(quantity, 0.001)
 
-    def generate_account_data(self, account_config: Dict,
-                             statement_date: datetime) -> Dict:
+    def calculate_targets(self, account_config: Dict,
+                          days_elapsed: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Generate holdings data for an account on a specific date.
+        Compute an account's target value for every statement date at once.
 
         Args:
             account_config: Account configuration
-            statement_date: Date of statement
+            days_elapsed: Days from the start date to each statement date
 
         Returns:
-            Dictionary with account and holdings data
+            Tuple of (current_targets, annual_returns) arrays, one entry per date
         """
-        # Select securities for this account
-        securities = self.select_securities_for_account(account_config)
-
-        # Calculate growth based on months elapsed
-        months_elapsed = (statement_date - self.start_date).days / 30
+        months_elapsed = np.asarray(days_elapsed, dtype=np.float64) / 30
         contributions = account_config['monthly_contribution'] * months_elapsed
 
         # Add some market growth (7-10% annually)
-        annual_return = self.random.uniform(0.07, 0.10)
-        market_growth = account_config['target_value'] * (annual_return / 12) * months_elapsed
-
-        current_target = account_config['target_value'] + contributions + market_growth
-
-        # Group securities by asset type for allocation
-        securities_by_type = {}
-        for asset_type, security in securities:
-            if asset_type not in securities_by_type:
-                securities_by_type[asset_type] = []
-            securities_by_type[asset_type].append(security)
-
-        # Generate holdings
-        holdings = []
-        total_market_value = 0
-
-        for asset_type, securities_list in securities_by_type.items():
-            allocation_weight = account_config['allocation'].get(asset_type, 0)
-            num_positions = len(securities_list)
-
-            for security in securities_list:
-                # Generate price for this date
-                price = self.generate_price_for_date(
-                    security, self.start_date, statement_date
-                )
+        annual_returns = self.rng.uniform(0.07, 0.10, size=len(months_elapsed))
+        market_growth = account_config['target_value'] * (annual_returns / 12) * months_elapsed
 
-                # Calculate quantity
-                quantity = self.calculate_quantity(
-                    current_target, price, allocation_weight, num_positions
-                )
+        current_targets = account_config['target_value'] + contributions + market_growth
+        return current_targets, annual_returns
 
-                market_value = price * quantity
+    def generate_account_data(self, account_config: Dict, statement_date: datetime,
+                              current_target: float = None, annual_return: float = None) -> Dict:
+        """
+        Generate holdings data for an account on a specific date.
 
-                # Book value (purchased ~1-3 years ago at lower price)
-                years_held = self.random.uniform(0.5, 3.0)
-                book_price = price * (1 - annual_return * years_held)
-                book_value = max(book_price * quantity, market_value * 0.7)
+        Args:
+            account_config: Account configuration
+            statement_date: Date of statement
+            current_target: Precomputed target value from calculate_targets
+            annual_return: Annual return drawn alongside current_target
 
-                asset_type_name, asset_category = ASSET_TYPE_MAPPING.get(
-                    asset_type, ('Stock', 'Equity')
-                )
+        Returns:
+            Dictionary with account and holdings data
+        """
+        # Select securities for this account
+        securities = self.select_securities_for_account(account_config)
 
-                holdings.append({
-                    'symbol': security.get('symbol'),
-                    'security_name': security['name'],
-                    'quantity': quantity,
-                    'price': price,
-                    'book_value': round(book_value, 2),
-                    'market_value': round(market_value, 2),
-                    'asset_type': asset_type_name,
-                    'asset_category': asset_category,
-                    'currency': 'CAD',
-                })
+        if current_target is None:
+            targets, returns = self.calculate_targets(
+                account_config, [(statement_date - self.start_date).days]
+            )
+            current_target, annual_return = float(targets[0]), float(returns[0])
+
+        # Position arrays, one entry per security (grouped by asset type)
+        positions_per_type = {}
+        for asset_type, _ in securities:
+            positions_per_type[asset_type] = positions_per_type.get(asset_type, 0) + 1
+
+        prices = np.array([
+            self.generate_price_for_date(security, self.start_date, statement_date)
+            for _, security in securities
+        ])
+        weights = np.array([account_config['allocation'].get(asset_type, 0) for asset_type, _ in securities])
+        num_positions = np.array([positions_per_type[asset_type] for asset_type, _ in securities])
+
+        quantities = self.calculate_quantity(current_target, prices, weights, num_positions)
+        market_values = prices * quantities
+
+        # Book value (purchased ~1-3 years ago at lower price)
+        years_held = self.rng.uniform(0.5, 3.0, size=len(securities))
+        book_values = np.maximum(prices * (1 - annual_return * years_held) * quantities, market_values * 0.7)
+
+        # Resolve each asset type's name and category once, not per position
+        type_names = {
+            asset_type: ASSET_TYPE_MAPPING.get(asset_type, ('Stock', 'Equity'))
+            for asset_type in positions_per_type
+        }
 
-                total_market_value += market_value
+        # Generate holdings
+        holdings = []
+        for (asset_type, security), price, quantity, market_value, book_value in zip(
+                securities, prices.tolist(), quantities.tolist(),
+                market_values.tolist(), book_values.tolist()):
+            asset_type_name, asset_category = type_names[asset_type]
+
+            holdings.append({
+                'symbol': security.get('symbol'),
+                'security_name': security['name'],
+                'quantity': quantity,
+                'price': price,
+                'book_value': round(book_value, 2),
+                'market_value': round(market_value, 2),
+                'asset_type': asset_type_name,
+                'asset_category': asset_category,
+                'currency': 'CAD',
+            })
+
+        total_market_value = float(market_values.sum())
 
         # Add cash balance (1-5% of portfolio)
-        cash_balance = total_market_value * self.random.uniform(0.01, 0.05)
+        cash_balance = total_market_value * float(self.rng.uniform(0.01, 0.05))
 
         return {
             'institution': account_config['institution'],
@@ -400,41 +484,70 @@ class SyntheticDataGenerator:
         """
         logger.info(f"Generating synthetic data for {len(ACCOUNT_CONFIGS)} accounts over {months} months")
 
-        # Generate statements quarterly
-        statement_dates = []
-        current = self.start_date
-
-        for i in range(0, months, 3):  # Quarterly statements
-            statement_date = current + timedelta(days=i * 30)
-            statement_dates.append(statement_date)
+        # Generate statements quarterly as datetime64 offsets from the start date;
+        # the datetime list is only kept for the DB-facing fields
+        offsets = np.arange(0, months, 3) * np.timedelta64(30, 'D')
+        statement_dates_np = np.datetime64(self.start_date, 'us') + offsets
+        statement_dates = statement_dates_np.tolist()
+        days_elapsed = offsets / np.timedelta64(1, 'D')
 
         logger.info(f"Creating {len(statement_dates)} quarterly statements per account")
 
+        # Price every security once per date, shared across accounts
+        self.precompute_prices(statement_dates, days_elapsed)
+
+        # A writer thread saves batches while the worker processes keep generating
+        statement_queue = queue.Queue(maxsize=WRITE_BATCH_SIZE * 2)
+        writer_errors = []
+        writer = threading.Thread(
+            target=self._drain_statements,
+            args=(statement_queue, writer_errors),
+            name='statement-writer',
+            daemon=True
+        )
+        writer.start()
+
         total_statements = 0
         total_holdings = 0
 
-        # Generate data for each account
-        for account_config in ACCOUNT_CONFIGS:
-            logger.info(f"Generating data for {account_config['institution']} - {account_config['account_number']}")
+        # Accounts are independent once prices are fixed, so each one is
+        # generated in its own process with a deterministic per-account seed
+        tasks = [
+            (self.start_date, account_config, statement_dates, days_elapsed, SEED + i)
+            for i, account_config in enumerate(ACCOUNT_CONFIGS)
+        ]
 
-            for statement_date in statement_dates:
-                # Generate holdings for this statement
-                statement_data = self.generate_account_data(account_config, statement_date)
-
-                # Save to database
-                try:
-                    self.db.save_statement_data(statement_data)
-                    total_statements += 1
-                    total_holdings += len(statement_data['holdings'])
+        try:
+            max_workers = min(len(tasks), os.cpu_count() or 1)
+            # The price cache is sent once per worker process, not with every task
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(self.price_cache,)) as executor:
+                for account_config, statements in zip(
+                        ACCOUNT_CONFIGS, executor.map(_generate_account_statements, tasks)):
+                    if writer_errors:
+                        break
+
+                    account_holdings = 0
+                    for statement_data in statements:
+                        statement_queue.put(statement_data)
+                        account_holdings += len(statement_data['holdings'])
+
+                    total_statements += len(statements)
+                    total_holdings += account_holdings
 
                     logger.info(
-                        f"  Saved statement for {statement_date.strftime('%Y-%m-%d')}: "
-                        f"{len(statement_data['holdings'])} holdings, "
-                        f"${statement_data['total_value']:,.2f} total value"
+                        "Generated data for %s - %s: %d statements, %d holdings, latest=$%.2f",
+                        account_config['institution'], account_config['account_number'],
+                        len(statements), account_holdings,
+                        statements[-1]['total_value'] if statements else 0.0
                     )
-                except Exception as e:
-                    logger.error(f"Error saving statement: {e}")
-                    raise
+        finally:
+            statement_queue.put(None)
+            writer.join()
+
+        if writer_errors:
+            logger.error(f"Error saving statements: {writer_errors[0]}")
+            raise writer_errors[0]
 
         logger.info("=" * 70)
         logger.info("Synthetic data generation complete!")
@@ -446,6 +559,32 @@ class SyntheticDataGenerator:
         # Print portfolio summary
         self.print_summary()
 
+    def _drain_statements(self, statement_queue: queue.Queue, errors: List[Exception]):
+        """
+        Writer thread: save queued statements in batches of WRITE_BATCH_SIZE
+        until a None sentinel arrives, committing each batch in its own
+        transaction so a late failure keeps the batches already written. On
+        error the failed batch is rolled back, the error is recorded in errors,
+        and the remaining statements are drained and dropped so the producer
+        never blocks.
+        """
+        finished = False
+        try:
+            batch = []
+            while not finished:
+                statement_data = statement_queue.get()
+                finished = statement_data is None
+                if not finished:
+                    batch.append(statement_data)
+
+                if batch and (finished or len(batch) >= WRITE_BATCH_SIZE):
+                    self.db.save_statements_data(batch)
+                    batch = []
+        except Exception as e:
+            errors.append(e)
+            while not finished:
+                finished = statement_queue.get() is None
+
     def print_summary(self):
         """Print summary statistics of generated data."""
         try:
@@ -462,28 +601,62 @@ class SyntheticDataGenerator:
                 GROUP BY i.institution_name
                 ORDER BY total_value DESC
             """
-            results = self.db.execute_query(query, fetch=True)
+            # Plain tuples; DECIMAL columns already arrive as floats
+            _, rows = self.db.execute_query(query, fetch=True, as_records=True)
+            grand_total = sum(total_value for _, _, total_value in rows)
 
             logger.info("\nPortfolio Summary (Latest Statement):")
             logger.info("-" * 70)
 
-            grand_total = 0
-            for row in results:
+            for institution_name, num_accounts, total_value in rows:
                 logger.info(
-                    f"  {row['institution_name']:20} - "
-                    f"{row['num_accounts']} account(s): "
-                    f"${float(row['total_value']):>12,.2f}"
+                    "  %-20s - %d account(s): $%12s",
+                    institution_name, num_accounts, format(total_value, ',.2f')
                 )
-                grand_total += float(row['total_value'])
 
             logger.info("-" * 70)
-            logger.info(f"  {'TOTAL PORTFOLIO':20}              ${grand_total:>12,.2f}")
+            logger.info("  %-20s              $%12s", 'TOTAL PORTFOLIO', format(grand_total, ',.2f'))
             logger.info("=" * 70)
 
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
 
 
+_worker_price_cache: Dict[str, Dict[datetime, float]] = {}
+
+
+def _init_worker(price_cache: Dict[str, Dict[datetime, float]]):
+    """Process pool initializer: keep the precomputed prices for every task in this worker."""
+    global _worker_price_cache
+    _worker_price_cache = price_cache
+
+
+def _generate_account_statements(task: Tuple) -> List[Dict]:
+    """
+    Process pool worker: generate every statement for one account.
+
+    Args:
+        task: (start_date, account_config, statement_dates, days_elapsed, seed)
+
+    Returns:
+        List of statement data dictionaries in statement date order
+    """
+    start_date, account_config, statement_dates, days_elapsed, seed = task
+
+    generator = SyntheticDataGenerator(None, seed=seed)
+    generator.start_date = start_date
+    generator.price_cache = _worker_price_cache
+
+    current_targets, annual_returns = generator.calculate_targets(account_config, days_elapsed)
+
+    return [
+        generator.generate_account_data(account_config, date, current_target, annual_return)
+        for date, current_target, annual_return in zip(
+            statement_dates, current_targets.tolist(), annual_returns.tolist()
+        )
+    ]
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -7,12 +7,14 @@ from .portfolio_data_agent import PortfolioDataAgent
 from .tax_advisor_agent import TaxAdvisorAgent
 from .estate_planner_agent import EstatePlannerAgent
 from .investment_analyst_agent import InvestmentAnalystAgent
+from .factory import AgentFactory
 
 __all__ = [
     'BaseAgent',
     'PortfolioDataAgent',
     'TaxAdvisorAgent',
     'EstatePlannerAgent',
-    'InvestmentAnalystAgent'
+    'InvestmentAnalystAgent',
+    'AgentFactory'
 ]
 
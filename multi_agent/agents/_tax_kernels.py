@@ -0,0 +1,36 @@
+"""
+Numeric kernels for the tax advisor agent.
+
+Numba is optional; when installed the kernels are compiled for an explicit
+signature (cached on disk), otherwise equivalent NumPy versions are used.
+"""
+
+from typing import Tuple
+import importlib.util
+
+import numpy as np
+
+
+if importlib.util.find_spec('numba') is not None:
+    from numba import njit
+
+    # No fastmath: a NaN difference must still propagate into the losses total
+    @njit('UniTuple(float64, 2)(float64[::1], float64[::1])', cache=True, nogil=True)
+    def aggregate_gains_losses(book, market):
+        """Return (total unrealized gains, total unrealized losses) in one pass."""
+        total_gains = 0.0
+        total_losses = 0.0
+        for i in range(book.shape[0]):
+            gain_loss = market[i] - book[i]
+            # Conditional expressions compile to selects, not branches
+            is_gain = gain_loss > 0
+            total_gains += gain_loss if is_gain else 0.0
+            total_losses -= 0.0 if is_gain else gain_loss
+        return total_gains, total_losses
+else:
+    def aggregate_gains_losses(book: np.ndarray, market: np.ndarray) -> Tuple[float, float]:
+        """Return (total unrealized gains, total unrealized losses)."""
+        diff = market - book
+        # Branchless clipping; fmax drops a NaN difference from the gains while
+        # minimum keeps it in the losses, as the scalar kernel does
+        return float(np.fmax(diff, 0.0).sum()), float(-np.minimum(diff, 0.0).sum())
@@ -2,30 +2,275 @@
 Base agent class with common functionality.
 """
 
-from typing import Dict, Any, Optional, List, Union
-from crewai import Agent
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Any, Hashable, Iterator, Optional, List, Sequence, Tuple
+import asyncio
+import hashlib
+import json
 import logging
 import os
+import threading
+import time
+
+from pydantic import BaseModel
+
+from ..observability.usage_queue import usage_queue
 
 logger = logging.getLogger(__name__)
 
-# Try to import tools, but make it optional
-try:
-    from crewai.tools import BaseTool
-    ToolType = Union[BaseTool, Any]
-except ImportError:
-    # BaseTool not available in this CrewAI version
-    ToolType = Any
+# CrewAI is heavy to import and only needed when a CrewAI Agent is requested,
+# so it is imported lazily in _create_crewai_agent
+if TYPE_CHECKING:
+    from crewai import Agent
+
+# crewai.tools.BaseTool or any tool object CrewAI accepts
+ToolType = Any
+
+
+def _to_jsonable(value: Any) -> Any:
+    """Serialize pydantic models nested in analysis data (dicts/lists) to JSON-ready values."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode='json')
+    if isinstance(value, dict):
+        return {k: _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+def _safe_float(value: Any) -> float:
+    """Convert a holding value to float, treating None and bad values as 0."""
+    # Database rows already hold floats; ints convert without error, so only
+    # other types (strings, Decimals) pay for the try/except
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value is None:
+        return 0.0
+    if value_type is int:
+        return float(value)
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+@lru_cache(maxsize=None)
+def _get_llm_tools(model: str):
+    """Shared LLMTools instance per model (imported lazily)."""
+    from ..tools.llm_tools import LLMTools
+    return LLMTools(model=model)
+
+
+@lru_cache(maxsize=None)
+def _build_llm(provider: str, model: str, temperature: float, api_key: Optional[str]):
+    """
+    Build a LangChain chat model once per (provider, model, temperature, api_key)
+    rather than once per agent; DeepSeek models use the process-wide HTTP pool.
+
+    Args:
+        provider: 'anthropic' or 'deepseek'
+        model: Model name
+        temperature: LLM temperature
+        api_key: Provider API key
+
+    Returns:
+        Chat model instance, or None for an unknown provider
+    """
+    if provider == 'anthropic':
+        from langchain_anthropic import ChatAnthropic
+        return ChatAnthropic(model=model, temperature=temperature, api_key=api_key)
+
+    if provider == 'deepseek':
+        # DeepSeek uses OpenAI-compatible API
+        from langchain_openai import ChatOpenAI
+        from ..tools.llm_tools import _http_client
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            openai_api_key=api_key,
+            openai_api_base="https://api.deepseek.com/v1",
+            # Same pool (and keep-alive limits) as the LLMTools clients
+            http_client=_http_client()
+        )
+
+    return None
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed TTL."""
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by all agents: (recommendations, explanation) keyed by payload hash
+_llm_cache = TTLCache()
+
+# Default number of analyses in flight at once in a batch
+BATCH_MAX_CONCURRENCY = 10
+
+
+class InsightsBatcher:
+    """
+    Coalesces LLM insight requests made in the same event-loop tick into one
+    provider call per LLMTools instance.
+    
+    Analyses started together (e.g. the tax, estate and investment nodes of a
+    workflow) reach their LLM step before the loop runs its next callback, so
+    flushing on call_soon collects them without adding any wait.
+    """
+    
+    def __init__(self):
+        # Batch calls are recorded under the context the batcher was created in
+        # (the workflow span), not under whichever analysis submitted first
+        self._context = copy_context()
+        self._pending: Dict[Any, Dict[str, Tuple[Dict[str, Any], asyncio.Future]]] = {}
+    
+    def submit(self, llm_tools: Any, payload: Dict[str, Any], analysis_type: str) -> "asyncio.Future":
+        """
+        Queue an analysis for the next batched call.
+        
+        Args:
+            llm_tools: LLMTools instance to call
+            payload: JSON-ready analysis data
+            analysis_type: Type of analysis (tax, estate, investment)
+            
+        Returns:
+            Future resolving to the insights dictionary, or None if the batch
+            did not produce them and the caller should make its own call
+        """
+        loop = asyncio.get_running_loop()
+        batch = self._pending.get(llm_tools)
+        # Analysis types key the batched response, so a repeat starts a new batch
+        if batch is None or analysis_type in batch:
+            batch = self._pending[llm_tools] = {}
+            loop.call_soon(self._flush, llm_tools, batch, context=self._context)
+        future = loop.create_future()
+        batch[analysis_type] = (payload, future)
+        return future
+    
+    def _flush(self, llm_tools: Any, batch: Dict[str, Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        if self._pending.get(llm_tools) is batch:
+            del self._pending[llm_tools]
+        asyncio.get_running_loop().create_task(self._run(llm_tools, batch))
+    
+    async def _run(self, llm_tools: Any, batch: Dict[str, Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        # A lone analysis gains nothing from the batch prompt; its caller makes the usual call
+        if len(batch) > 1:
+            try:
+                results = await llm_tools.generate_insights_batch_async(
+                    [{"analysis_type": analysis_type, "data": payload}
+                     for analysis_type, (payload, _) in batch.items()]
+                )
+            except Exception as e:
+                logger.warning(f"Batched LLM insights failed, falling back to per-analysis calls: {e}")
+        
+        for (payload, future), insights in zip(batch.values(), results):
+            if not future.done():
+                future.set_result(insights)
+
+
+_insights_batcher: ContextVar[Optional[InsightsBatcher]] = ContextVar("insights_batcher", default=None)
+
+
+@contextmanager
+def batched_llm_insights() -> Iterator[InsightsBatcher]:
+    """
+    Batch the LLM insight calls of analyses run concurrently inside this block.
+    
+    Tasks created inside the block inherit the batcher, so their
+    enhance_with_llm_async calls share a single provider request.
+    
+    Yields:
+        The active InsightsBatcher
+    """
+    batcher = InsightsBatcher()
+    token = _insights_batcher.set(batcher)
+    try:
+        yield batcher
+    finally:
+        _insights_batcher.reset(token)
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    asyncio.run cannot be nested, so when called from inside a running
+    event loop (e.g. an async web handler) the coroutine gets its own loop
+    on a worker thread instead. The loop's LLM connection pool is closed
+    before the loop is.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The coroutine's result
+    """
+    from ..tools.llm_tools import aclose_async_clients
+    
+    async def run_and_close():
+        try:
+            return await coro
+        finally:
+            await aclose_async_clients()
+    
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(run_and_close())
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, run_and_close()).result()
 
 
 class BaseAgent:
     """Base class for all agents with common functionality."""
     
+    __slots__ = ('name', 'role', 'goal', 'backstory', 'tools', 'model', 'temperature', 'verbose',
+                 'cache_llm', 'llm_tools', '_llm_available', '_crewai_agent')
+    
     def __init__(self, name: str, role: str, goal: str, backstory: str,
                  tools: Optional[List[ToolType]] = None,
                  model: str = "deepseek-chat",
                  temperature: float = 0.3,
-                 verbose: bool = True):
+                 verbose: bool = True,
+                 cache_llm: bool = False):
         """
         Initialize base agent.
         
@@ -38,6 +283,8 @@ class BaseAgent:
             model: LLM model to use
             temperature: LLM temperature
             verbose: Enable verbose logging
+            cache_llm: Reuse LLM insights for identical analysis data (always
+                       on when temperature is 0, since output is deterministic)
         """
         self.name = name
         self.role = role
@@ -47,58 +294,52 @@ class BaseAgent:
         self.model = model
         self.temperature = temperature
         self.verbose = verbose
+        self.cache_llm = cache_llm or temperature == 0
         
         # Initialize LLM tools if API keys are available
-        self.llm_tools = None
-        try:
-            from ..tools.llm_tools import LLMTools
-            self.llm_tools = LLMTools(model=model)
-            if self.llm_tools.is_available():
-                logger.info(f"{self.name}: LLM available ({'DeepSeek' if self.llm_tools.use_deepseek else 'Anthropic'})")
-            else:
-                logger.debug(f"{self.name}: LLM not available (no API key)")
-        except ImportError as e:
-            logger.debug(f"{self.name}: LLM tools not available: {e}")
+        self._init_llm_tools()
         
-        # Create CrewAI agent (optional - only if needed for CrewAI tasks)
-        # Skip creation since we're using direct method calls, not CrewAI tasks
+        # CrewAI agent is only needed for CrewAI tasks; the analyses use direct
+        # method calls, so it is built on first get_agent() unless requested up front
         self._crewai_agent = None
+        if os.getenv("ENABLE_CREWAI_AGENT") == "1":
+            self._crewai_agent = self._create_crewai_agent()
+    
+    def _create_crewai_agent(self) -> Optional["Agent"]:
+        """Create the CrewAI agent if an LLM is available."""
+        if not self._llm_available:
+            return None
         
-        # Optionally create CrewAI agent if LLM is available and user wants it
-        if self.llm_tools and self.llm_tools.is_available():
-            try:
-                # Configure LLM for CrewAI
-                if self.llm_tools.use_anthropic:
-                    from langchain_anthropic import ChatAnthropic
-                    llm = ChatAnthropic(
-                        model=self.llm_tools.model or "claude-3-opus-20240229",
-                        temperature=temperature
-                    )
-                elif self.llm_tools.use_deepseek:
-                    # DeepSeek uses OpenAI-compatible API
-                    from langchain_openai import ChatOpenAI
-                    llm = ChatOpenAI(
-                        model=self.llm_tools.model or "deepseek-chat",
-                        temperature=temperature,
-                        openai_api_key=self.llm_tools.api_key,
-                        openai_api_base="https://api.deepseek.com/v1"
-                    )
-                else:
-                    llm = None
-                
-                if llm:
-                    self._crewai_agent = Agent(
-                        role=role,
-                        goal=goal,
-                        backstory=backstory,
-                        tools=tools or [],
-                        verbose=verbose,
-                        allow_delegation=False,
-                        llm=llm
-                    )
-                    logger.debug(f"{self.name}: CrewAI Agent created with LLM")
-            except Exception as e:
-                logger.debug(f"{self.name}: Could not create CrewAI Agent: {e}")
+        try:
+            from crewai import Agent
+            
+            # Configure LLM for CrewAI
+            if self.llm_tools.use_anthropic:
+                llm = _build_llm(
+                    'anthropic', self.llm_tools.model or "claude-3-opus-20240229", self.temperature, self.llm_tools.api_key
+                )
+            elif self.llm_tools.use_deepseek:
+                llm = _build_llm(
+                    'deepseek', self.llm_tools.model or "deepseek-chat", self.temperature, self.llm_tools.api_key
+                )
+            else:
+                llm = None
+            
+            if llm:
+                agent = Agent(
+                    role=self.role,
+                    goal=self.goal,
+                    backstory=self.backstory,
+                    tools=self.tools,
+                    verbose=self.verbose,
+                    allow_delegation=False,
+                    llm=llm
+                )
+                logger.debug(f"{self.name}: CrewAI Agent created with LLM")
+                return agent
+        except Exception as e:
+            logger.debug(f"{self.name}: Could not create CrewAI Agent: {e}")
+        return None
     
     def process(self, task_description: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -132,20 +373,47 @@ class BaseAgent:
                 "error": str(e)
             }
     
-    def get_agent(self) -> Optional[Agent]:
-        """Get the underlying CrewAI agent (if available)."""
+    def get_agent(self) -> Optional["Agent"]:
+        """Get the underlying CrewAI agent (if available), creating it on first use."""
+        if self._crewai_agent is None:
+            self._crewai_agent = self._create_crewai_agent()
         return self._crewai_agent
     
+    def _init_llm_tools(self):
+        """Look up the shared LLM tools and record whether they can be used."""
+        self.llm_tools = None
+        try:
+            self.llm_tools = _get_llm_tools(self.model)
+            if self.llm_tools.is_available():
+                logger.info(f"{self.name}: LLM available ({'DeepSeek' if self.llm_tools.use_deepseek else 'Anthropic'})")
+            else:
+                logger.debug(f"{self.name}: LLM not available (no API key)")
+        except ImportError as e:
+            logger.debug(f"{self.name}: LLM tools not available: {e}")
+        # API keys are read once, so availability is fixed until refreshed
+        self._llm_available = self.llm_tools is not None and self.llm_tools.is_available()
+    
     def use_llm_analysis(self) -> bool:
         """Check if LLM analysis is available."""
-        return self.llm_tools is not None and self.llm_tools.is_available()
+        return self._llm_available
+    
+    def refresh_llm_availability(self) -> bool:
+        """
+        Re-read API keys from the environment, e.g. after they were set at runtime.
+        
+        Returns:
+            True if LLM analysis is now available
+        """
+        _get_llm_tools.cache_clear()
+        self._init_llm_tools()
+        return self._llm_available
     
     def enhance_with_llm(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
         """
         Enhance analysis results with LLM-generated insights.
         
         Args:
-            data: Analysis data dictionary
+            data: Analysis data dictionary (may contain pydantic models)
             analysis_type: Type of analysis (tax, estate, investment)
             
         Returns:
@@ -154,23 +422,106 @@ class BaseAgent:
         if not self.use_llm_analysis():
             return data
         
+        # Serialize model objects once; the cache key and prompt share it
+        payload = _to_jsonable(data)
+        cache_key = self._llm_cache_key(payload, analysis_type)
+        cached = _llm_cache.get(cache_key) if self.cache_llm else None
+        usage_queue.put({"agent": self.name, "type": analysis_type, "cached": cached is not None})
+        if cached is not None:
+            return self._with_llm_insights(data, *cached)
+        
         try:
-            # Generate LLM recommendations
-            llm_recommendations = self.llm_tools.generate_recommendations(data, analysis_type)
+            # One call returns both the recommendations and the explanation
+            insights = self.llm_tools.generate_insights(payload, analysis_type)
+            llm_recommendations, explanation = insights['recommendations'], insights['explanation']
             
-            # Generate explanation
-            explanation = self.llm_tools.explain_analysis(data, analysis_type)
+            if self.cache_llm:
+                _llm_cache.set(cache_key, (llm_recommendations, explanation))
             
-            # Add LLM insights to data
-            enhanced = data.copy()
-            enhanced['llm_insights'] = {
-                'explanation': explanation,
-                'recommendations': llm_recommendations,
-                'llm_provider': 'DeepSeek' if self.llm_tools.use_deepseek else 'Anthropic'
-            }
+            return self._with_llm_insights(data, llm_recommendations, explanation)
+        except Exception as e:
+            logger.error(f"Error enhancing with LLM: {e}")
+            return data
+    
+    async def enhance_with_llm_async(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
+        """
+        Async version of enhance_with_llm, so several agents' LLM calls can
+        be awaited concurrently.
+        
+        Args:
+            data: Analysis data dictionary (may contain pydantic models)
+            analysis_type: Type of analysis (tax, estate, investment)
+            
+        Returns:
+            Enhanced data dictionary with LLM insights
+        """
+        if not self.use_llm_analysis():
+            return data
+        
+        # Serialize model objects once; the cache key and prompt share it
+        payload = _to_jsonable(data)
+        cache_key = self._llm_cache_key(payload, analysis_type)
+        cached = _llm_cache.get(cache_key) if self.cache_llm else None
+        usage_queue.put({"agent": self.name, "type": analysis_type, "cached": cached is not None})
+        if cached is not None:
+            return self._with_llm_insights(data, *cached)
+        
+        try:
+            # Inside batched_llm_insights, concurrent analyses share one call
+            batcher = _insights_batcher.get()
+            insights = await batcher.submit(self.llm_tools, payload, analysis_type) if batcher else None
+            if insights is None:
+                insights = await self.llm_tools.generate_insights_async(payload, analysis_type)
+            llm_recommendations, explanation = insights['recommendations'], insights['explanation']
+            
+            if self.cache_llm:
+                _llm_cache.set(cache_key, (llm_recommendations, explanation))
             
-            return enhanced
+            return self._with_llm_insights(data, llm_recommendations, explanation)
         except Exception as e:
             logger.error(f"Error enhancing with LLM: {e}")
             return data
-
+    
+    def _llm_cache_key(self, data: Dict[str, Any], analysis_type: str) -> str:
+        """Hash the canonical JSON of everything that determines the LLM output."""
+        canonical = json.dumps(
+            {"type": analysis_type, "data": data, "model": self.llm_tools.model,
+             "temperature": self.temperature},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _with_llm_insights(self, data: Dict[str, Any], llm_recommendations: List[Dict[str, Any]],
+                           explanation: str) -> Dict[str, Any]:
+        """Return a copy of data with the llm_insights block added."""
+        enhanced = data.copy()
+        enhanced['llm_insights'] = {
+            'explanation': explanation,
+            'recommendations': llm_recommendations,
+            'llm_provider': 'DeepSeek' if self.llm_tools.use_deepseek else 'Anthropic'
+        }
+        return enhanced
+    
+    def _run_batch(self, analyze_async: Callable[..., Awaitable[Any]],
+                   requests: Sequence[tuple], max_concurrency: int = BATCH_MAX_CONCURRENCY) -> List[Any]:
+        """
+        Run an async analysis over many argument tuples, at most max_concurrency at a time.
+        
+        Args:
+            analyze_async: Async analysis method, e.g. self.analyze_estate_async
+            requests: Positional argument tuples, one per analysis
+            max_concurrency: Maximum analyses (and so LLM calls) in flight at once
+            
+        Returns:
+            Results in the same order as requests
+        """
+        async def run_all():
+            semaphore = asyncio.Semaphore(max_concurrency)
+            
+            async def run_one(args):
+                async with semaphore:
+                    return await analyze_async(*args)
+            
+            return await asyncio.gather(*(run_one(args) for args in requests))
+        
+        return list(run_sync(run_all()))
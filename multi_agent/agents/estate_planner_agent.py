@@ -2,18 +2,33 @@
 Estate Planner Agent - Estate Planning Specialist.
 """
 
-from typing import Dict, Any, Optional, List
-from .base_agent import BaseAgent
+from collections import defaultdict
+from typing import Dict, Any, Iterable, Optional, List, Sequence, Tuple
+from .base_agent import BaseAgent, BATCH_MAX_CONCURRENCY, _safe_float
 from ..tools.analysis_tools import AnalysisTools
 from ..schemas.agent_outputs import EstatePlannerOutput, EstateRecommendation, ProductRecommendation
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Beneficiary designation recommendation text; only the counts and savings vary per call
+_BENEFICIARY_RATIONALE_TMPL = (
+    "Only {with_beneficiary} of {num_accounts} accounts have beneficiaries. "
+    "Designating beneficiaries can avoid probate on registered accounts."
+)
+_BENEFICIARY_BENEFIT_TMPL = "Potential probate savings: ${savings:,.2f}"
+_BENEFICIARY_STEPS = (
+    "Review each registered account (RRSP, TFSA, LIRA)",
+    "Designate primary and contingent beneficiaries",
+    "Update beneficiary designations with institutions"
+)
+
 
 class EstatePlannerAgent(BaseAgent):
     """Agent responsible for estate planning and product recommendations."""
     
+    __slots__ = ('analysis_tools',)
+    
     def __init__(self, model: str = "deepseek-chat", temperature: float = 0.3):
         """Initialize Estate Planner Agent."""
         self.analysis_tools = AnalysisTools()
@@ -33,110 +48,167 @@ class EstatePlannerAgent(BaseAgent):
         )
     
     def analyze_estate(self, portfolio_summary: Dict[str, Any],
-                      holdings: List[Dict[str, Any]],
+                      holdings: Iterable[Dict[str, Any]],
                       user_context: Dict[str, Any]) -> EstatePlannerOutput:
         """
         Analyze portfolio for estate planning opportunities.
         
         Args:
             portfolio_summary: Portfolio summary dictionary
-            holdings: List of holding dictionaries
+            holdings: Holding dictionaries; any iterable, read once
             user_context: User context including age, province, etc.
             
         Returns:
             EstatePlannerOutput with recommendations
         """
         try:
-            total_value = portfolio_summary.get('total_value', 0)
-            province = user_context.get('province', 'ON')
-            age = user_context.get('age', 65)
-            
-            # Calculate probate fees
-            probate_fees = self.analysis_tools.calculate_probate_fees(total_value, province)
-            
-            # Analyze account structure
-            accounts = self._analyze_account_structure(holdings)
-            accounts_with_beneficiaries = sum(1 for acc in accounts if acc.get('has_beneficiary', False))
-            
-            # Generate recommendations
-            recommendations = []
-            
-            # Beneficiary designation recommendations
-            if accounts_with_beneficiaries < len(accounts):
-                recommendations.append(EstateRecommendation(
-                    priority="High",
-                    category="Beneficiary Designation",
-                    action="Designate beneficiaries on registered accounts",
-                    rationale=f"Only {accounts_with_beneficiaries} of {len(accounts)} accounts have beneficiaries. "
-                             f"Designating beneficiaries can avoid probate on registered accounts.",
-                    estate_benefit=f"Potential probate savings: ${probate_fees * 0.3:,.2f}",
-                    implementation_steps=[
-                        "Review each registered account (RRSP, TFSA, LIRA)",
-                        "Designate primary and contingent beneficiaries",
-                        "Update beneficiary designations with institutions"
-                    ]
-                ))
-            
-            # Product recommendations based on allocation
-            product_recommendations = self._generate_product_recommendations(
-                portfolio_summary, user_context
+            output_data, recommendations, product_recommendations = self._build_estate_analysis(
+                portfolio_summary, holdings, user_context
             )
             
-            # Account structure optimization
-            current_structure = self._get_current_structure(holdings)
-            recommended_structure = self._recommend_structure_optimization(
-                current_structure, user_context
-            )
-            
-            # Build output
-            output_data = {
-                "summary": {
-                    "total_estate_value": float(total_value),
-                    "estimated_probate_fees": float(probate_fees),
-                    "estate_tax_estimate": 0.0,  # Canada doesn't have estate tax
-                    "accounts_with_beneficiaries": accounts_with_beneficiaries,
-                    "accounts_without_beneficiaries": len(accounts) - accounts_with_beneficiaries
-                },
-                "recommendations": [r.dict() for r in recommendations],
-                "product_recommendations": [p.dict() for p in product_recommendations],
-                "account_structure_optimization": {
-                    "current_structure": current_structure,
-                    "recommended_structure": recommended_structure,
-                    "rebalancing_steps": []
-                }
-            }
-            
             # Enhance with LLM if available
             if self.use_llm_analysis():
-                logger.info(f"{self.name}: Enhancing analysis with LLM")
                 output_data = self.enhance_with_llm(output_data, "estate")
             
-            return EstatePlannerOutput(
-                estate_planning_report=output_data.get("summary", {}),
-                recommendations=recommendations,
-                product_recommendations=product_recommendations,
-                account_structure_optimization=output_data.get("account_structure_optimization", {}),
-                llm_insights=output_data.get("llm_insights")
+            return self._estate_output(output_data, recommendations, product_recommendations)
+        except Exception as e:
+            logger.error(f"Error in estate analysis: {e}")
+            return EstatePlannerOutput()
+    
+    async def analyze_estate_async(self, portfolio_summary: Dict[str, Any],
+                                   holdings: Iterable[Dict[str, Any]],
+                                   user_context: Dict[str, Any]) -> EstatePlannerOutput:
+        """Async version of analyze_estate; LLM enhancement calls run concurrently."""
+        try:
+            output_data, recommendations, product_recommendations = self._build_estate_analysis(
+                portfolio_summary, holdings, user_context
             )
+            
+            # Enhance with LLM if available
+            if self.use_llm_analysis():
+                output_data = await self.enhance_with_llm_async(output_data, "estate")
+            
+            return self._estate_output(output_data, recommendations, product_recommendations)
         except Exception as e:
             logger.error(f"Error in estate analysis: {e}")
             return EstatePlannerOutput()
     
-    def _analyze_account_structure(self, holdings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Analyze account structure from holdings."""
+    def analyze_estate_batch(self, requests: Sequence[Tuple[Dict[str, Any], Iterable[Dict[str, Any]], Dict[str, Any]]],
+                             max_concurrency: int = BATCH_MAX_CONCURRENCY) -> List[EstatePlannerOutput]:
+        """
+        Analyze many portfolios, running their LLM enhancements concurrently.
+        
+        Args:
+            requests: (portfolio_summary, holdings, user_context) tuple per portfolio
+            max_concurrency: Maximum analyses in flight at once
+            
+        Returns:
+            EstatePlannerOutput per request, in order
+        """
+        return self._run_batch(self.analyze_estate_async, requests, max_concurrency)
+    
+    def _build_estate_analysis(self, portfolio_summary: Dict[str, Any],
+                               holdings: Iterable[Dict[str, Any]],
+                               user_context: Dict[str, Any]) -> tuple:
+        """Run the rule-based analysis and build the output data."""
+        total_value = portfolio_summary.get('total_value', 0)
+        province = user_context.get('province', 'ON')
+        age = user_context.get('age', 65)
+        
+        # Calculate probate fees
+        probate_fees = self.analysis_tools.calculate_probate_fees(total_value, province)
+        
+        # Analyze account structure (per account and per account type in one pass)
+        accounts, current_structure = self._aggregate_holdings(holdings)
+        accounts_with_beneficiaries = sum(1 for acc in accounts if acc.get('has_beneficiary', False))
+        
+        # Generate recommendations
+        recommendations = []
+        
+        # Beneficiary designation recommendations
+        if accounts_with_beneficiaries < len(accounts):
+            recommendations.append(EstateRecommendation(
+                priority="High",
+                category="Beneficiary Designation",
+                action="Designate beneficiaries on registered accounts",
+                rationale=_BENEFICIARY_RATIONALE_TMPL.format(
+                    with_beneficiary=accounts_with_beneficiaries, num_accounts=len(accounts)
+                ),
+                estate_benefit=_BENEFICIARY_BENEFIT_TMPL.format(savings=probate_fees * 0.3),
+                # Validated into a fresh list, so the shared tuple is never mutated
+                implementation_steps=_BENEFICIARY_STEPS
+            ))
+        
+        # Product recommendations based on allocation
+        product_recommendations = self._generate_product_recommendations(
+            portfolio_summary, user_context
+        )
+        
+        # Account structure optimization
+        recommended_structure = self._recommend_structure_optimization(
+            current_structure, user_context
+        )
+        
+        # Build output
+        output_data = {
+            "summary": {
+                "total_estate_value": float(total_value),
+                "estimated_probate_fees": float(probate_fees),
+                "estate_tax_estimate": 0.0,  # Canada doesn't have estate tax
+                "accounts_with_beneficiaries": accounts_with_beneficiaries,
+                "accounts_without_beneficiaries": len(accounts) - accounts_with_beneficiaries
+            },
+            "recommendations": recommendations,
+            "product_recommendations": product_recommendations,
+            "account_structure_optimization": {
+                "current_structure": current_structure,
+                "recommended_structure": recommended_structure,
+                "rebalancing_steps": []
+            }
+        }
+        
+        return output_data, recommendations, product_recommendations
+    
+    def _estate_output(self, output_data, recommendations, product_recommendations) -> EstatePlannerOutput:
+        """Build the agent output from (possibly LLM-enhanced) output data."""
+        return EstatePlannerOutput(
+            estate_planning_report=output_data.get("summary", {}),
+            recommendations=recommendations,
+            product_recommendations=product_recommendations,
+            account_structure_optimization=output_data.get("account_structure_optimization", {}),
+            llm_insights=output_data.get("llm_insights")
+        )
+    
+    def _aggregate_holdings(self, holdings: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """
+        Aggregate holdings by account and by account type in a single pass.
+        
+        Args:
+            holdings: Holding dictionaries; any iterable, read once
+            
+        Returns:
+            Tuple of (accounts list, market value by account type)
+        """
         accounts = {}
+        structure = defaultdict(float)
         for holding in holdings:
-            account_key = f"{holding.get('institution_name', '')}_{holding.get('account_number', '')}"
-            if account_key not in accounts:
-                accounts[account_key] = {
-                    'account_number': holding.get('account_number', ''),
+            institution_name = holding.get('institution_name', '')
+            account_number = holding.get('account_number', '')
+            market_value = _safe_float(holding.get('market_value'))
+            
+            account = accounts.get((institution_name, account_number))
+            if account is None:
+                account = accounts[(institution_name, account_number)] = {
+                    'account_number': account_number,
                     'account_type': holding.get('account_type', ''),
-                    'institution_name': holding.get('institution_name', ''),
+                    'institution_name': institution_name,
                     'has_beneficiary': False,  # Would need to check database
                     'value': 0
                 }
-            accounts[account_key]['value'] += float(holding.get('market_value', 0))
-        return list(accounts.values())
+            account['value'] += market_value
+            
+            structure[holding.get('account_type', 'Unknown')] += market_value
+        return list(accounts.values()), dict(structure)
     
     def _generate_product_recommendations(self, portfolio_summary: Dict[str, Any],
                                           user_context: Dict[str, Any]) -> List[ProductRecommendation]:
@@ -169,16 +241,6 @@ class EstatePlannerAgent(BaseAgent):
         
         return recommendations
     
-    def _get_current_structure(self, holdings: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Get current account structure."""
-        structure = {}
-        for holding in holdings:
-            account_type = holding.get('account_type', 'Unknown')
-            if account_type not in structure:
-                structure[account_type] = 0
-            structure[account_type] += float(holding.get('market_value', 0))
-        return structure
-    
     def _recommend_structure_optimization(self, current_structure: Dict[str, Any],
                                          user_context: Dict[str, Any]) -> Dict[str, Any]:
         """Recommend optimized account structure."""
@@ -0,0 +1,53 @@
+"""
+Factory for building the core agents together.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+from .portfolio_data_agent import PortfolioDataAgent
+from .tax_advisor_agent import TaxAdvisorAgent
+from .estate_planner_agent import EstatePlannerAgent
+from .investment_analyst_agent import InvestmentAnalystAgent
+
+
+class AgentFactory:
+    """Creates agent instances."""
+    
+    AGENT_CLASSES = (PortfolioDataAgent, TaxAdvisorAgent, EstatePlannerAgent, InvestmentAnalystAgent)
+    
+    @classmethod
+    def create(cls, agent_classes: Sequence[type], model: Optional[str] = None) -> Tuple:
+        """
+        Build the given agents concurrently.
+        
+        Construction is mostly I/O (database pool, LLM client setup), so the
+        agents are built on a thread pool instead of one after another.
+        
+        Args:
+            agent_classes: Agent classes to instantiate
+            model: Optional model name for every agent; each agent's default otherwise
+        
+        Returns:
+            Tuple of agents, in the order of agent_classes
+        """
+        kwargs = {"model": model} if model else {}
+        if len(agent_classes) <= 1:
+            return tuple(agent_class(**kwargs) for agent_class in agent_classes)
+        with ThreadPoolExecutor(max_workers=len(agent_classes)) as executor:
+            futures = [executor.submit(agent_class, **kwargs) for agent_class in agent_classes]
+            return tuple(future.result() for future in futures)
+    
+    @classmethod
+    def create_all(cls, model: Optional[str] = None) -> Tuple[PortfolioDataAgent, TaxAdvisorAgent,
+                                                               EstatePlannerAgent, InvestmentAnalystAgent]:
+        """
+        Build the portfolio data, tax, estate and investment agents concurrently.
+        
+        Args:
+            model: Optional model name for every agent; each agent's default otherwise
+        
+        Returns:
+            Tuple of (portfolio, tax, estate, investment) agents
+        """
+        return cls.create(cls.AGENT_CLASSES, model)
@@ -2,17 +2,21 @@
 Investment Analyst Agent - Securities Research and Portfolio Optimization Specialist.
 """
 
-from typing import Dict, Any, Optional, List
-from .base_agent import BaseAgent
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from .base_agent import BaseAgent, BATCH_MAX_CONCURRENCY, _safe_float
 from ..schemas.agent_outputs import InvestmentAnalystOutput, SecurityRecommendation, RebalancingAction
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
 class InvestmentAnalystAgent(BaseAgent):
     """Agent responsible for investment analysis and recommendations."""
     
+    __slots__ = ()
+    
     def __init__(self, model: str = "deepseek-chat", temperature: float = 0.3):
         """Initialize Investment Analyst Agent."""
         super().__init__(
@@ -29,14 +33,14 @@ class InvestmentAnalystAgent(BaseAgent):
             verbose=True
         )
     
-    def analyze_investments(self, holdings: List[Dict[str, Any]],
+    def analyze_investments(self, holdings: Iterable[Dict[str, Any]],
                            portfolio_summary: Dict[str, Any],
                            user_context: Dict[str, Any]) -> InvestmentAnalystOutput:
         """
         Analyze investments and provide recommendations.
         
         Args:
-            holdings: List of holding dictionaries
+            holdings: Holding dictionaries; any iterable, read once
             portfolio_summary: Portfolio summary
             user_context: User context including risk profile
             
@@ -44,110 +48,165 @@ class InvestmentAnalystAgent(BaseAgent):
             InvestmentAnalystOutput with recommendations
         """
         try:
-            # Calculate total portfolio value
-            total_value = portfolio_summary.get('total_value', 0)
-            if total_value == 0:
-                total_value = sum(
-                    float(h.get('market_value') or 0) if h.get('market_value') is not None else 0.0
-                    for h in holdings
-                )
-            
-            # Identify overweight/underweight positions
-            security_recommendations = []
-            overweight_positions = []
-            underweight_positions = []
-            
-            # Analyze each holding
-            for holding in holdings:
-                # Handle None values safely
-                market_value_raw = holding.get('market_value')
-                try:
-                    market_value = float(market_value_raw) if market_value_raw is not None else 0.0
-                except (ValueError, TypeError):
-                    market_value = 0.0
-                
-                allocation_pct = (market_value / total_value * 100) if total_value > 0 else 0
-                
-                # Simple rule: if position > 10% of portfolio, consider overweight
-                if allocation_pct > 10:
-                    overweight_positions.append({
-                        'security': holding.get('security_name', ''),
-                        'allocation': allocation_pct
-                    })
-                    security_recommendations.append(SecurityRecommendation(
-                        security_name=holding.get('security_name') or 'Unknown',
-                        symbol=holding.get('symbol') or '',  # Ensure it's a string, not None
-                        current_allocation_pct=allocation_pct,
-                        recommendation="Reduce",
-                        action="Reduce position size",
-                        target_allocation_pct=8.0,
-                        rationale=f"Position represents {allocation_pct:.1f}% of portfolio, "
-                                f"exceeding recommended 10% concentration limit",
-                        risk_factors=["Concentration risk"],
-                        confidence_level="High",
-                        timeframe="3-6 months"
-                    ))
-                elif allocation_pct < 1 and market_value > 1000:
-                    # Small positions that could be consolidated
-                    underweight_positions.append({
-                        'security': holding.get('security_name', ''),
-                        'allocation': allocation_pct
-                    })
-            
-            # Calculate portfolio health score
-            health_score = self._calculate_health_score(holdings, portfolio_summary)
-            
-            # Generate rebalancing plan
-            rebalancing_plan = self._generate_rebalancing_plan(
-                holdings, overweight_positions, total_value
+            output_data, security_recommendations, rebalancing_plan = self._build_investment_analysis(
+                holdings, portfolio_summary, user_context
             )
             
-            # Sector analysis
-            sector_analysis = self._analyze_sectors(holdings)
-            
-            # Build output
-            output_data = {
-                "summary": {
-                    "portfolio_health_score": health_score,
-                    "overweight_positions": overweight_positions,
-                    "underweight_positions": underweight_positions,
-                    "concentration_risk_level": "High" if len(overweight_positions) > 3 else "Moderate",
-                    "rebalancing_urgency": "High" if len(overweight_positions) > 2 else "Medium"
-                },
-                "security_recommendations": [r.dict() for r in security_recommendations],
-                "sector_analysis": sector_analysis,
-                "rebalancing_plan": [a.dict() for a in rebalancing_plan],
-                "market_context": {
-                    "market_conditions": "Normal",
-                    "relevant_trends": [],
-                    "risk_warnings": []
-                }
-            }
-            
             # Enhance with LLM if available
             if self.use_llm_analysis():
-                logger.info(f"{self.name}: Enhancing analysis with LLM")
                 output_data = self.enhance_with_llm(output_data, "investment")
             
-            return InvestmentAnalystOutput(
-                investment_analysis_report=output_data.get("summary", {}),
-                security_recommendations=security_recommendations,
-                sector_analysis=output_data.get("sector_analysis", {}),
-                rebalancing_plan=rebalancing_plan,
-                market_context=output_data.get("market_context", {}),
-                llm_insights=output_data.get("llm_insights")
+            return self._investment_output(output_data, security_recommendations, rebalancing_plan)
+        except Exception as e:
+            logger.error(f"Error in investment analysis: {e}")
+            return InvestmentAnalystOutput()
+    
+    async def analyze_investments_async(self, holdings: Iterable[Dict[str, Any]],
+                                        portfolio_summary: Dict[str, Any],
+                                        user_context: Dict[str, Any]) -> InvestmentAnalystOutput:
+        """Async version of analyze_investments; LLM enhancement calls run concurrently."""
+        try:
+            output_data, security_recommendations, rebalancing_plan = self._build_investment_analysis(
+                holdings, portfolio_summary, user_context
             )
+            
+            # Enhance with LLM if available
+            if self.use_llm_analysis():
+                output_data = await self.enhance_with_llm_async(output_data, "investment")
+            
+            return self._investment_output(output_data, security_recommendations, rebalancing_plan)
         except Exception as e:
             logger.error(f"Error in investment analysis: {e}")
             return InvestmentAnalystOutput()
     
-    def _calculate_health_score(self, holdings: List[Dict[str, Any]],
-                                portfolio_summary: Dict[str, Any]) -> float:
-        """Calculate portfolio health score (0-10)."""
+    def analyze_investments_batch(self, requests: Sequence[Tuple[Iterable[Dict[str, Any]], Dict[str, Any], Dict[str, Any]]],
+                                  max_concurrency: int = BATCH_MAX_CONCURRENCY) -> List[InvestmentAnalystOutput]:
+        """
+        Analyze many portfolios, running their LLM enhancements concurrently.
+        
+        Args:
+            requests: (holdings, portfolio_summary, user_context) tuple per portfolio
+            max_concurrency: Maximum analyses in flight at once
+            
+        Returns:
+            InvestmentAnalystOutput per request, in order
+        """
+        return self._run_batch(self.analyze_investments_async, requests, max_concurrency)
+    
+    def _build_investment_analysis(self, holdings: Iterable[Dict[str, Any]],
+                                   portfolio_summary: Dict[str, Any],
+                                   user_context: Dict[str, Any]) -> tuple:
+        """Run the rule-based analysis and build the output data."""
+        # One pass keeps only names, symbols and market values, not the holding dicts
+        names, symbols, values = [], [], []
+        safe_float = _safe_float
+        for h in holdings:
+            names.append(h.get('security_name', ''))
+            symbols.append(h.get('symbol'))
+            values.append(safe_float(h.get('market_value')))
+        
+        # Market values as one array; allocations and masks are vector ops on it
+        market_values = np.array(values, dtype=np.float64)
+        
+        # Calculate total portfolio value
+        total_value = portfolio_summary.get('total_value', 0)
+        if total_value == 0:
+            total_value = float(market_values.sum())
+        
+        allocations = market_values / total_value * 100 if total_value > 0 else np.zeros_like(market_values)
+        
+        # Simple rule: if position > 10% of portfolio, consider overweight
+        overweight_idx = np.flatnonzero(allocations > 10)
+        # Small positions that could be consolidated
+        underweight_idx = np.flatnonzero((allocations < 1) & (market_values > 1000))
+        
+        security_recommendations = []
+        overweight_positions = []
+        for i, allocation_pct in zip(overweight_idx.tolist(), allocations[overweight_idx].tolist()):
+            overweight_positions.append({
+                'security': names[i],
+                'allocation': allocation_pct
+            })
+            security_recommendations.append(SecurityRecommendation(
+                security_name=names[i] or 'Unknown',
+                symbol=symbols[i] or '',  # Ensure it's a string, not None
+                current_allocation_pct=allocation_pct,
+                recommendation="Reduce",
+                action="Reduce position size",
+                target_allocation_pct=8.0,
+                rationale=f"Position represents {allocation_pct:.1f}% of portfolio, "
+                        f"exceeding recommended 10% concentration limit",
+                risk_factors=["Concentration risk"],
+                confidence_level="High",
+                timeframe="3-6 months"
+            ))
+        
+        underweight_positions = [
+            {'security': names[i], 'allocation': allocation_pct}
+            for i, allocation_pct in zip(underweight_idx.tolist(), allocations[underweight_idx].tolist())
+        ]
+        
+        # Calculate portfolio health score
+        health_score = self._calculate_health_score(market_values, portfolio_summary, allocations)
+        
+        # Generate rebalancing plan
+        rebalancing_plan = self._generate_rebalancing_plan(
+            overweight_positions, market_values[overweight_idx], total_value
+        )
+        
+        # Sector analysis
+        sector_analysis = self._analyze_sectors()
+        
+        # Build output
+        output_data = {
+            "summary": {
+                "portfolio_health_score": health_score,
+                "overweight_positions": overweight_positions,
+                "underweight_positions": underweight_positions,
+                "concentration_risk_level": "High" if len(overweight_positions) > 3 else "Moderate",
+                "rebalancing_urgency": "High" if len(overweight_positions) > 2 else "Medium"
+            },
+            "security_recommendations": security_recommendations,
+            "sector_analysis": sector_analysis,
+            "rebalancing_plan": rebalancing_plan,
+            "market_context": {
+                "market_conditions": "Normal",
+                "relevant_trends": [],
+                "risk_warnings": []
+            }
+        }
+        
+        return output_data, security_recommendations, rebalancing_plan
+    
+    def _investment_output(self, output_data, security_recommendations, rebalancing_plan) -> InvestmentAnalystOutput:
+        """Build the agent output from (possibly LLM-enhanced) output data."""
+        return InvestmentAnalystOutput(
+            investment_analysis_report=output_data.get("summary", {}),
+            security_recommendations=security_recommendations,
+            sector_analysis=output_data.get("sector_analysis", {}),
+            rebalancing_plan=rebalancing_plan,
+            market_context=output_data.get("market_context", {}),
+            llm_insights=output_data.get("llm_insights")
+        )
+    
+    def _calculate_health_score(self, market_values: np.ndarray,
+                                portfolio_summary: Dict[str, Any],
+                                allocations: Optional[np.ndarray] = None) -> float:
+        """
+        Calculate portfolio health score (0-10) from the holdings' market values.
+        
+        Args:
+            market_values: Market value of each holding
+            portfolio_summary: Portfolio summary
+            allocations: Optional precomputed percentage of the portfolio per holding
+            
+        Returns:
+            Health score between 0 and 10
+        """
         score = 7.0  # Base score
         
         # Adjust based on diversification
-        num_holdings = len(holdings)
+        num_holdings = len(market_values)
         if num_holdings > 20:
             score += 1.0
         elif num_holdings < 5:
@@ -155,12 +214,10 @@ class InvestmentAnalystAgent(BaseAgent):
         
         # Adjust based on concentration
         total_value = portfolio_summary.get('total_value', 0)
-        if total_value > 0 and holdings:
-            max_position = max(
-                (float(h.get('market_value') or 0) / total_value * 100)
-                if h.get('market_value') is not None else 0.0
-                for h in holdings
-            )
+        if total_value > 0 and num_holdings:
+            if allocations is None:
+                allocations = market_values / total_value * 100
+            max_position = float(allocations.max())
             if max_position > 20:
                 score -= 1.5
             elif max_position < 10:
@@ -168,38 +225,37 @@ class InvestmentAnalystAgent(BaseAgent):
         
         return max(0.0, min(10.0, score))
     
-    def _generate_rebalancing_plan(self, holdings: List[Dict[str, Any]],
-                                   overweight_positions: List[Dict[str, Any]],
+    def _generate_rebalancing_plan(self, overweight_positions: List[Dict[str, Any]],
+                                   overweight_values: np.ndarray,
                                    total_value: float) -> List[RebalancingAction]:
-        """Generate rebalancing plan."""
-        plan = []
-        
-        for pos in overweight_positions[:5]:  # Top 5 overweight positions
-            # Find the holding
-            for holding in holdings:
-                if holding.get('security_name') == pos['security']:
-                    market_value_raw = holding.get('market_value')
-                    try:
-                        current_value = float(market_value_raw) if market_value_raw is not None else 0.0
-                    except (ValueError, TypeError):
-                        current_value = 0.0
-                    
-                    target_value = total_value * 0.08  # Target 8%
-                    reduction = current_value - target_value
-                    
-                    if reduction > 0:
-                        plan.append(RebalancingAction(
-                            security=pos['security'],
-                            action="Sell",
-                            quantity=None,  # Would need to calculate from price
-                            estimated_value=reduction,
-                            reason=f"Reduce from {pos['allocation']:.1f}% to 8% target allocation"
-                        ))
-                    break
-        
-        return plan
+        """
+        Generate rebalancing plan.
+        
+        Args:
+            overweight_positions: Overweight positions from the analysis
+            overweight_values: Market value of each overweight position
+            total_value: Total portfolio value
+            
+        Returns:
+            Sell actions bringing the top 5 overweight positions to 8%
+        """
+        positions = overweight_positions[:5]  # Top 5 overweight positions
+        target_value = total_value * 0.08  # Target 8%
+        reductions = np.asarray(overweight_values[:len(positions)], dtype=np.float64) - target_value
+        
+        return [
+            RebalancingAction(
+                security=pos['security'],
+                action="Sell",
+                quantity=None,  # Would need to calculate from price
+                estimated_value=reduction,
+                reason=f"Reduce from {pos['allocation']:.1f}% to 8% target allocation"
+            )
+            for pos, reduction in zip(positions, reductions.tolist())
+            if reduction > 0
+        ]
     
-    def _analyze_sectors(self, holdings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_sectors(self) -> Dict[str, Any]:
         """Analyze sector exposure."""
         # Simplified - would need sector classification
         return {
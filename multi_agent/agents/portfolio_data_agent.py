@@ -2,22 +2,38 @@
 Portfolio Data Agent - Data Specialist and Context Provider.
 """
 
-from typing import Dict, Any, Optional, List
-from crewai import Agent, Task
-from .base_agent import BaseAgent
-from ..tools.database_tools import DatabaseTools
+from typing import Dict, Any, Callable, Optional, List
+from .base_agent import BaseAgent, TTLCache
+from ..tools.database_tools import DatabaseTools, register_dependent_cache
 from ..schemas.agent_outputs import PortfolioDataOutput
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Reads within one orchestration share results for this long
+DATA_CACHE_TTL_SECONDS = 30.0
+
+
+def _copy_result(value: Any) -> Any:
+    """Copy the lists and dicts of a query result so callers can't modify the cached one."""
+    if type(value) is list:
+        return [_copy_result(item) for item in value]
+    if type(value) is dict:
+        return {key: _copy_result(item) for key, item in value.items()}
+    return value
+
 
 class PortfolioDataAgent(BaseAgent):
     """Agent responsible for portfolio data retrieval and aggregation."""
     
+    __slots__ = ('db_tools', '_data_cache')
+    
     def __init__(self, model: str = "deepseek-chat", temperature: float = 0.1):
         """Initialize Portfolio Data Agent."""
         self.db_tools = DatabaseTools()
+        self._data_cache = TTLCache(max_entries=256, ttl_seconds=DATA_CACHE_TTL_SECONDS)
+        # Database writes anywhere in the process drop the cached data
+        register_dependent_cache(self._data_cache)
         
         super().__init__(
             name="PortfolioDataAgent",
@@ -33,18 +49,41 @@ class PortfolioDataAgent(BaseAgent):
             verbose=True
         )
     
+    def invalidate(self):
+        """
+        Drop cached data, e.g. after statements were written by another process.
+        
+        Writes made through a DatabaseManager in this process already do this.
+        """
+        if self.db_tools.db_manager:
+            self.db_tools.db_manager.invalidate_cache()
+        else:
+            self._data_cache.clear()
+    
+    def _cached(self, key: tuple, fetch: Callable[[], Any]) -> Any:
+        """Return the cached result for key, calling fetch on a miss or after the TTL."""
+        result = self._data_cache.get(key)
+        if result is None:
+            result = fetch()
+            self._data_cache.set(key, result)
+        # Callers get their own copy; the cached result is shared
+        return _copy_result(result)
+    
     def get_portfolio_summary(self) -> Dict[str, Any]:
         """Get comprehensive portfolio summary."""
-        return self.db_tools.get_portfolio_summary()
+        return self._cached(("get_portfolio_summary", None, None),
+                            self.db_tools.get_portfolio_summary)
     
     def get_holdings(self, institution: Optional[str] = None,
                     account_number: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get latest holdings."""
-        return self.db_tools.get_latest_holdings(institution, account_number)
+        return self._cached(("get_holdings", institution, account_number),
+                            lambda: self.db_tools.get_latest_holdings(institution, account_number))
     
     def get_allocation(self, institution: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get portfolio allocation."""
-        return self.db_tools.get_portfolio_allocation(institution)
+        return self._cached(("get_allocation", institution, None),
+                            lambda: self.db_tools.get_portfolio_allocation(institution))
     
     def get_value_trend(self, institution: Optional[str] = None,
                        start_date: Optional[str] = None,
@@ -57,6 +96,10 @@ class PortfolioDataAgent(BaseAgent):
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get portfolio metrics including concentration and diversification."""
+        return self._cached(("get_metrics", None, None), self._fetch_metrics)
+    
+    def _fetch_metrics(self) -> Dict[str, Any]:
+        """Query concentration and diversification metrics."""
         concentration = self.db_tools.get_concentration_risk()
         diversification = self.db_tools.get_diversification_score()
         
@@ -65,6 +108,40 @@ class PortfolioDataAgent(BaseAgent):
             "diversification_metrics": diversification
         }
     
+    def get_core_data(self, institution: Optional[str] = None,
+                      account_number: Optional[str] = None) -> PortfolioDataOutput:
+        """
+        Get everything except the allocation, from a single holdings fetch.
+        
+        The analyses only need the holdings and summary, so a workflow can
+        start them on this output while the allocation is still being queried.
+        
+        Args:
+            institution: Optional institution filter
+            account_number: Optional account number filter
+            
+        Returns:
+            PortfolioDataOutput with an empty allocation
+        """
+        bundle = self._cached(("get_bundle", institution, account_number),
+                              lambda: self.db_tools.get_bundle(institution, account_number))
+        
+        # Rows come straight from our own queries, so skip revalidating
+        # every holding dict
+        return PortfolioDataOutput.model_construct(
+            portfolio_summary=bundle["portfolio_summary"],
+            holdings=bundle["holdings"],
+            allocation={},
+            concentration_metrics=bundle["concentration_metrics"],
+            diversification_metrics=bundle["diversification_metrics"]
+        )
+    
+    @staticmethod
+    def with_allocation(core_data: PortfolioDataOutput,
+                        allocation: List[Dict[str, Any]]) -> PortfolioDataOutput:
+        """Complete a get_core_data output with the allocation rows."""
+        return core_data.model_copy(update={"allocation": {"by_category": allocation} if allocation else {}})
+    
     def process_request(self, request: Dict[str, Any]) -> PortfolioDataOutput:
         """
         Process a data request and return structured output.
@@ -82,26 +159,9 @@ class PortfolioDataAgent(BaseAgent):
         account_number = filters.get("account_number")
         
         try:
-            # Get portfolio summary
-            portfolio_summary = self.get_portfolio_summary()
-            
-            # Get holdings
-            holdings = self.get_holdings(institution, account_number)
-            
-            # Get allocation
-            allocation = self.get_allocation(institution)
-            
-            # Get metrics
-            metrics = self.get_metrics()
-            
-            return PortfolioDataOutput(
-                portfolio_summary=portfolio_summary,
-                holdings=holdings,
-                allocation={"by_category": allocation} if allocation else {},
-                concentration_metrics=metrics.get("concentration_metrics", {}),
-                diversification_metrics=metrics.get("diversification_metrics", {})
-            )
+            # Summary, holdings and metrics share one holdings fetch
+            core_data = self.get_core_data(institution, account_number)
+            return self.with_allocation(core_data, self.get_allocation(institution))
         except Exception as e:
             logger.error(f"Error processing portfolio data request: {e}")
             return PortfolioDataOutput()
-
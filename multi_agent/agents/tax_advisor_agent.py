@@ -3,10 +3,16 @@ Tax Advisor Agent - Tax Optimization Specialist.
 """
 
 from typing import Dict, Any, Optional, List
-from .base_agent import BaseAgent
+from .base_agent import BaseAgent, _safe_float
+from ._tax_kernels import aggregate_gains_losses
 from ..tools.analysis_tools import AnalysisTools
 from ..schemas.agent_outputs import TaxAdvisorOutput, TaxRecommendation, TaxLossHarvesting
+from operator import itemgetter
+import heapq
 import logging
+import math
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +20,8 @@ logger = logging.getLogger(__name__)
 class TaxAdvisorAgent(BaseAgent):
     """Agent responsible for tax optimization and planning."""
     
+    __slots__ = ('analysis_tools',)
+    
     def __init__(self, model: str = "deepseek-chat", temperature: float = 0.2):
         """Initialize Tax Advisor Agent."""
         self.analysis_tools = AnalysisTools()
@@ -45,124 +53,144 @@ class TaxAdvisorAgent(BaseAgent):
             TaxAdvisorOutput with recommendations
         """
         try:
-            # Calculate unrealized gains/losses
-            total_gains = 0.0
-            total_losses = 0.0
-            
-            for holding in holdings:
-                # Handle None values safely
-                book_value_raw = holding.get('book_value') or holding.get('book_value', 0)
-                market_value_raw = holding.get('market_value') or holding.get('market_value', 0)
-                
-                try:
-                    book_value = float(book_value_raw) if book_value_raw is not None else 0.0
-                except (ValueError, TypeError):
-                    book_value = 0.0
-                
-                try:
-                    market_value = float(market_value_raw) if market_value_raw is not None else 0.0
-                except (ValueError, TypeError):
-                    market_value = 0.0
-                
-                gain_loss = market_value - book_value
-                
-                if gain_loss > 0:
-                    total_gains += gain_loss
-                else:
-                    total_losses += abs(gain_loss)
-            
-            # Get tax bracket (default to 30% if not provided)
-            tax_rate = float(user_context.get('tax_rate', 0.30))
-            province = user_context.get('province', 'ON')
-            
-            # Estimate tax liability
-            taxable_gains = total_gains * 0.5  # 50% inclusion rate
-            estimated_tax = taxable_gains * tax_rate
-            
-            # Identify tax loss harvesting opportunities
-            loss_opportunities = self.analysis_tools.identify_tax_loss_harvesting(holdings)
-            
-            # Calculate potential tax savings
-            potential_savings = sum(opp['tax_benefit'] for opp in loss_opportunities)
-            
-            # Generate recommendations
-            recommendations = []
-            
-            # Tax loss harvesting recommendations
-            for opp in loss_opportunities[:5]:  # Top 5 opportunities
-                recommendations.append(TaxRecommendation(
-                    priority="High" if opp['tax_benefit'] > 500 else "Medium",
-                    action=f"Sell {opp['security']} to realize tax loss",
-                    security=opp['security'],
-                    account=opp['account'],
-                    rationale=f"Unrealized loss of ${opp['unrealized_loss']:,.2f} can provide "
-                             f"${opp['tax_benefit']:,.2f} in tax savings",
-                    tax_impact=-opp['tax_benefit'],
-                    timing="Before year-end"
-                ))
-            
-            # Withdrawal strategy
-            withdrawal_strategy = self._recommend_withdrawal_strategy(holdings, user_context)
-            
-            # Build output
-            output_data = {
-                "summary": {
-                    "total_unrealized_gains": float(total_gains),
-                    "total_unrealized_losses": float(total_losses),
-                    "estimated_tax_liability": float(estimated_tax),
-                    "potential_tax_savings": float(potential_savings)
-                },
-                "recommendations": [r.dict() for r in recommendations],
-                "tax_loss_harvesting": [
-                    {
-                        "security": opp['security'],
-                        "unrealized_loss": opp['unrealized_loss'],
-                        "tax_benefit": opp['tax_benefit'],
-                        "superficial_loss_warning": False
-                    }
-                    for opp in loss_opportunities[:10]
-                ],
-                "withdrawal_strategy": withdrawal_strategy
-            }
+            output_data, recommendations = self._build_tax_analysis(
+                holdings, user_context
+            )
             
-            # Enhance with LLM if available
-            if self.use_llm_analysis():
-                logger.info(f"{self.name}: Enhancing analysis with LLM")
+            # Enhance with LLM if available and there is something to comment on
+            if self.use_llm_analysis() and self._has_findings(output_data):
                 output_data = self.enhance_with_llm(output_data, "tax")
             
-            output = TaxAdvisorOutput(
-                tax_optimization_report=output_data.get("summary", {}),
-                recommendations=recommendations,
-                tax_loss_harvesting=[
-                    TaxLossHarvesting(**item) for item in output_data.get("tax_loss_harvesting", [])
-                ],
-                withdrawal_strategy=output_data.get("withdrawal_strategy", {}),
-                llm_insights=output_data.get("llm_insights")
+            return self._tax_output(output_data, recommendations)
+        except Exception as e:
+            logger.error(f"Error in tax analysis: {e}")
+            return TaxAdvisorOutput()
+    
+    async def analyze_portfolio_async(self, holdings: List[Dict[str, Any]],
+                                      user_context: Dict[str, Any]) -> TaxAdvisorOutput:
+        """Async version of analyze_portfolio; LLM enhancement calls run concurrently."""
+        try:
+            output_data, recommendations = self._build_tax_analysis(
+                holdings, user_context
             )
             
-            return output
+            # Enhance with LLM if available and there is something to comment on
+            if self.use_llm_analysis() and self._has_findings(output_data):
+                output_data = await self.enhance_with_llm_async(output_data, "tax")
+            
+            return self._tax_output(output_data, recommendations)
         except Exception as e:
             logger.error(f"Error in tax analysis: {e}")
             return TaxAdvisorOutput()
     
+    def _build_tax_analysis(self, holdings: List[Dict[str, Any]],
+                            user_context: Dict[str, Any]) -> tuple:
+        """Run the rule-based analysis and build the output data."""
+        # Calculate unrealized gains/losses over book and market value arrays
+        book = np.fromiter((_safe_float(h.get('book_value')) for h in holdings),
+                           dtype=np.float64, count=len(holdings))
+        market = np.fromiter((_safe_float(h.get('market_value')) for h in holdings),
+                             dtype=np.float64, count=len(holdings))
+        total_gains, total_losses = aggregate_gains_losses(book, market)
+        
+        # Get tax bracket (default to 30% if not provided)
+        tax_rate = float(user_context.get('tax_rate', 0.30))
+        province = user_context.get('province', 'ON')
+        
+        # Estimate tax liability
+        taxable_gains = total_gains * 0.5  # 50% inclusion rate
+        estimated_tax = taxable_gains * tax_rate
+        
+        # Identify tax loss harvesting opportunities
+        loss_opportunities = self.analysis_tools.identify_tax_loss_harvesting(holdings, sort=False)
+        
+        # Calculate potential tax savings
+        potential_savings = math.fsum(opp['tax_benefit'] for opp in loss_opportunities)
+        
+        # Only the 10 largest are reported, so select them without sorting everything
+        top_opportunities = heapq.nlargest(10, loss_opportunities, key=itemgetter('tax_benefit'))
+        
+        # Generate recommendations
+        recommendations = []
+        
+        # Tax loss harvesting recommendations
+        for opp in top_opportunities[:5]:  # Top 5 opportunities
+            recommendations.append(TaxRecommendation(
+                priority="High" if opp['tax_benefit'] > 500 else "Medium",
+                action=f"Sell {opp['security']} to realize tax loss",
+                security=opp['security'],
+                account=opp['account'],
+                rationale=f"Unrealized loss of ${opp['unrealized_loss']:,.2f} can provide "
+                         f"${opp['tax_benefit']:,.2f} in tax savings",
+                tax_impact=-opp['tax_benefit'],
+                timing="Before year-end"
+            ))
+        
+        # Withdrawal strategy
+        withdrawal_strategy = self._recommend_withdrawal_strategy(holdings, user_context)
+        
+        # Build output
+        output_data = {
+            "summary": {
+                "total_unrealized_gains": float(total_gains),
+                "total_unrealized_losses": float(total_losses),
+                "estimated_tax_liability": float(estimated_tax),
+                "potential_tax_savings": float(potential_savings)
+            },
+            "recommendations": recommendations,
+            "tax_loss_harvesting": [
+                TaxLossHarvesting(
+                    security=opp['security'],
+                    unrealized_loss=opp['unrealized_loss'],
+                    tax_benefit=opp['tax_benefit'],
+                    superficial_loss_warning=False
+                )
+                for opp in top_opportunities
+            ],
+            "withdrawal_strategy": withdrawal_strategy
+        }
+        
+        return output_data, recommendations
+    
+    @staticmethod
+    def _has_findings(output_data: Dict[str, Any]) -> bool:
+        """Whether the analysis found gains, losses or harvesting opportunities."""
+        summary = output_data["summary"]
+        return (bool(output_data["tax_loss_harvesting"])
+                or summary["total_unrealized_gains"] > 0
+                or summary["total_unrealized_losses"] > 0)
+    
+    def _tax_output(self, output_data, recommendations) -> TaxAdvisorOutput:
+        """Build the agent output from (possibly LLM-enhanced) output data."""
+        output = TaxAdvisorOutput(
+            tax_optimization_report=output_data.get("summary", {}),
+            recommendations=recommendations,
+            tax_loss_harvesting=output_data.get("tax_loss_harvesting", []),
+            withdrawal_strategy=output_data.get("withdrawal_strategy", {}),
+            llm_insights=output_data.get("llm_insights")
+        )
+        
+        return output
+    
     def _recommend_withdrawal_strategy(self, holdings: List[Dict[str, Any]],
                                       user_context: Dict[str, Any]) -> Dict[str, Any]:
         """Recommend optimal withdrawal order."""
-        # Group holdings by account type
+        # Group holdings by account
         accounts = {}
         for holding in holdings:
-            account_type = holding.get('account_type', 'Unknown')
-            account_key = f"{holding.get('institution_name', '')}_{holding.get('account_number', '')}"
+            institution_name = holding.get('institution_name', '')
+            account_number = holding.get('account_number', '')
             
-            if account_key not in accounts:
-                accounts[account_key] = {
-                    'account_number': holding.get('account_number', ''),
-                    'account_type': account_type,
-                    'institution_name': holding.get('institution_name', ''),
+            account = accounts.get((institution_name, account_number))
+            if account is None:
+                account = accounts[(institution_name, account_number)] = {
+                    'account_number': account_number,
+                    'account_type': holding.get('account_type', 'Unknown'),
+                    'institution_name': institution_name,
                     'balance': 0
                 }
             
-            accounts[account_key]['balance'] += float(holding.get('market_value', 0))
+            account['balance'] += float(holding.get('market_value') or 0)
         
         account_list = list(accounts.values())
         recommendations = self.analysis_tools.recommend_withdrawal_order(account_list)
@@ -2,6 +2,8 @@
 Standard disclaimers for financial advisory outputs.
 """
 
+from types import MappingProxyType
+
 DISCLAIMER = """
 IMPORTANT DISCLAIMER:
 This analysis is provided for informational and educational purposes only.
@@ -35,6 +37,14 @@ consult with a qualified estate planning attorney and financial advisor for
 personalized estate planning advice.
 """
 
+# Disclaimer per agent type
+_DISCLAIMERS = MappingProxyType({
+    "tax": TAX_DISCLAIMER,
+    "investment": INVESTMENT_DISCLAIMER,
+    "estate": ESTATE_DISCLAIMER,
+    "general": DISCLAIMER
+})
+
 
 def add_disclaimer_to_output(output: dict, agent_type: str = "general") -> dict:
     """
@@ -47,17 +57,5 @@ def add_disclaimer_to_output(output: dict, agent_type: str = "general") -> dict:
     Returns:
         Output dictionary with disclaimer added
     """
-    disclaimers = {
-        "tax": TAX_DISCLAIMER,
-        "investment": INVESTMENT_DISCLAIMER,
-        "estate": ESTATE_DISCLAIMER,
-        "general": DISCLAIMER
-    }
-    
-    disclaimer = disclaimers.get(agent_type, DISCLAIMER)
-    
-    if "disclaimer" not in output:
-        output["disclaimer"] = disclaimer
-    
+    output.setdefault("disclaimer", _DISCLAIMERS.get(agent_type, DISCLAIMER))
     return output
-
@@ -2,8 +2,8 @@
 Workflow flows for multi-agent orchestration.
 """
 
-from .financial_advisory_flow import FinancialAdvisoryFlow
+from .financial_advisory_flow import FinancialAdvisoryFlow, get_default_flow
 from .workflow_orchestrator import WorkflowOrchestrator
 
-__all__ = ['FinancialAdvisoryFlow', 'WorkflowOrchestrator']
+__all__ = ['FinancialAdvisoryFlow', 'WorkflowOrchestrator', 'get_default_flow']
 
@@ -2,12 +2,16 @@
 Financial Advisory Flow - Main entry point for financial advisory workflows.
 """
 
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from ..flows.workflow_orchestrator import WorkflowOrchestrator
 import logging
 
 logger = logging.getLogger(__name__)
 
+COMPREHENSIVE_REVIEW_QUERY = ("Provide a comprehensive financial review including tax optimization, "
+                              "estate planning, and investment analysis")
+
 
 class FinancialAdvisoryFlow:
     """Main flow controller for financial advisory workflows."""
@@ -55,8 +59,39 @@ class FinancialAdvisoryFlow:
         Returns:
             Comprehensive financial review
         """
-        query = "Provide a comprehensive financial review including tax optimization, "
-        query += "estate planning, and investment analysis"
-        
-        return self.process_query(query, user_context, workflow_type="sequential")
+        # The tax, estate and investment analyses only share the portfolio data,
+        # so they run concurrently
+        return self.process_query(COMPREHENSIVE_REVIEW_QUERY, user_context, workflow_type="parallel")
+    
+    async def get_comprehensive_review_async(self, user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async version of get_comprehensive_review for callers already in an event loop."""
+        try:
+            logger.info(f"Processing query: {COMPREHENSIVE_REVIEW_QUERY}")
+            return await self.orchestrator.execute_parallel_workflow_async(COMPREHENSIVE_REVIEW_QUERY, user_context)
+        except Exception as e:
+            logger.error(f"Error processing query: {e}")
+            return {
+                "error": str(e),
+                "status": "error",
+                "query": COMPREHENSIVE_REVIEW_QUERY
+            }
 
+
+@lru_cache(maxsize=1)
+def get_default_flow() -> FinancialAdvisoryFlow:
+    """
+    Get the process-wide FinancialAdvisoryFlow.
+    
+    Reusing one flow keeps its orchestrator and agents (database pool, LLM
+    clients) warm across queries instead of rebuilding them per request.
+    The flow is shared by every request thread of the web app. Workflow
+    calls keep their state local, agents are built once under a lock, the
+    agents' caches and the database connection pool are lock-protected, and
+    async LLM clients are kept per event loop (each sync call runs its own
+    loop). Anything added to the flow, orchestrator or agents that is
+    mutated during a workflow must be made thread-safe as well.
+    
+    Returns:
+        Shared FinancialAdvisoryFlow instance
+    """
+    return FinancialAdvisoryFlow()
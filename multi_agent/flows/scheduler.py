@@ -0,0 +1,69 @@
+"""
+Dependency-driven scheduler for agent workflows.
+
+A workflow is declared as nodes with named dependencies; each node starts as
+soon as all of its dependencies have finished rather than waiting for a whole
+stage, so a slow branch only delays the nodes that actually need its result.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Sequence
+import asyncio
+
+
+@dataclass
+class Node:
+    """A unit of work in a workflow graph."""
+    name: str
+    deps: Sequence[str]
+    # Called with {dependency name: result} once every dependency is done
+    coro_factory: Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+async def run_dag(nodes: Iterable[Node]) -> Dict[str, Any]:
+    """
+    Run a graph of nodes, starting each one as soon as its dependencies finish.
+
+    Ready nodes are started in declaration order. Each node runs as its own
+    task, so context variables it sets do not leak into other nodes.
+    If a node raises, the nodes still running are cancelled and the
+    exception propagates.
+
+    Args:
+        nodes: Nodes to run; dependencies refer to other node names
+
+    Returns:
+        Dictionary mapping each node name to its result
+
+    Raises:
+        ValueError: If a dependency is unknown or the graph has a cycle
+    """
+    waiting = {node.name: node for node in nodes}
+    for node in waiting.values():
+        unknown = [dep for dep in node.deps if dep not in waiting]
+        if unknown:
+            raise ValueError(f"Node {node.name!r} depends on unknown nodes: {unknown}")
+
+    results: Dict[str, Any] = {}
+    running: Dict[asyncio.Task, str] = {}
+    try:
+        while waiting or running:
+            for name, node in list(waiting.items()):
+                if all(dep in results for dep in node.deps):
+                    del waiting[name]
+                    task = asyncio.create_task(node.coro_factory({dep: results[dep] for dep in node.deps}))
+                    running[task] = name
+
+            if not running:
+                raise ValueError(f"Dependency cycle among nodes: {sorted(waiting)}")
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[running.pop(task)] = task.result()
+    finally:
+        if running:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    return results
@@ -7,6 +7,8 @@ from ..agents.portfolio_data_agent import PortfolioDataAgent
 from ..agents.tax_advisor_agent import TaxAdvisorAgent
 from ..agents.estate_planner_agent import EstatePlannerAgent
 from ..agents.investment_analyst_agent import InvestmentAnalystAgent
+from ..agents.base_agent import batched_llm_insights, run_sync
+from ..agents.factory import AgentFactory
 from ..schemas.workflow_state import WorkflowState, UserContext
 from ..observability.hooks import (
     start_session,
@@ -16,7 +18,11 @@ from ..observability.hooks import (
     set_current_context,
 )
 from ..observability.events import SpanKind
+from .scheduler import Node, run_dag
+from functools import cached_property
+import asyncio
 import logging
+import threading
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -25,12 +31,45 @@ logger = logging.getLogger(__name__)
 class WorkflowOrchestrator:
     """Orchestrates multi-agent workflows."""
     
+    # Attribute name -> agent class, for building the agents together
+    AGENT_ATTRIBUTES = {
+        "portfolio_agent": PortfolioDataAgent,
+        "tax_agent": TaxAdvisorAgent,
+        "estate_agent": EstatePlannerAgent,
+        "investment_agent": InvestmentAnalystAgent,
+    }
+    
     def __init__(self):
-        """Initialize orchestrator with agents."""
-        self.portfolio_agent = PortfolioDataAgent()
-        self.tax_agent = TaxAdvisorAgent()
-        self.estate_agent = EstatePlannerAgent()
-        self.investment_agent = InvestmentAnalystAgent()
+        """Initialize orchestrator; agents are created on first use."""
+        self._agents_lock = threading.Lock()
+    
+    # Agents are built on first use, so callers that need only some of them
+    # don't pay for constructing the rest
+    @cached_property
+    def portfolio_agent(self) -> PortfolioDataAgent:
+        return PortfolioDataAgent()
+    
+    @cached_property
+    def tax_agent(self) -> TaxAdvisorAgent:
+        return TaxAdvisorAgent()
+    
+    @cached_property
+    def estate_agent(self) -> EstatePlannerAgent:
+        return EstatePlannerAgent()
+    
+    @cached_property
+    def investment_agent(self) -> InvestmentAnalystAgent:
+        return InvestmentAnalystAgent()
+    
+    def _load_agents(self):
+        """Build every agent not created yet, concurrently; the full workflows use all four."""
+        # The lock keeps concurrent workflows on a shared orchestrator from
+        # building the same agents twice
+        with self._agents_lock:
+            missing = [name for name in self.AGENT_ATTRIBUTES if name not in self.__dict__]
+            agents = AgentFactory.create([self.AGENT_ATTRIBUTES[name] for name in missing])
+            # Stored where cached_property would have put them
+            self.__dict__.update(zip(missing, agents))
     
     def execute_sequential_workflow(self, query: str,
                                    user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -44,6 +83,7 @@ class WorkflowOrchestrator:
         Returns:
             Comprehensive analysis results
         """
+        self._load_agents()
         obs_session_id: Optional[str] = None
         try:
             # Observability: start session and workflow span
@@ -55,6 +95,8 @@ class WorkflowOrchestrator:
                 session_id=str(uuid.uuid4()),
                 user_context=UserContext(**user_context) if user_context else UserContext()
             )
+            # Serialized once and shared by every agent call
+            user_context_dict = state.user_context.model_dump()
 
             # Step 1: Get portfolio data
             logger.info("Step 1: Gathering portfolio data...")
@@ -63,7 +105,8 @@ class WorkflowOrchestrator:
             try:
                 portfolio_request = {"action": "get_all", "filters": {}}
                 portfolio_data = self.portfolio_agent.process_request(portfolio_request)
-                state.data_cache["portfolio_data"] = portfolio_data.dict()
+                portfolio_dict = portfolio_data.model_dump()
+                state.data_cache["portfolio_data"] = portfolio_dict
             finally:
                 end_span(step_span_id)
                 set_current_context(obs_session_id, workflow_span_id)
@@ -75,9 +118,9 @@ class WorkflowOrchestrator:
             try:
                 tax_analysis = self.tax_agent.analyze_portfolio(
                     portfolio_data.holdings,
-                    state.user_context.dict()
+                    user_context_dict
                 )
-                state.agent_outputs["tax_advisor"] = tax_analysis.dict()
+                state.agent_outputs["tax_advisor"] = tax_dict = tax_analysis.model_dump()
             finally:
                 end_span(step_span_id)
                 set_current_context(obs_session_id, workflow_span_id)
@@ -90,9 +133,9 @@ class WorkflowOrchestrator:
                 estate_analysis = self.estate_agent.analyze_estate(
                     portfolio_data.portfolio_summary,
                     portfolio_data.holdings,
-                    state.user_context.dict()
+                    user_context_dict
                 )
-                state.agent_outputs["estate_planner"] = estate_analysis.dict()
+                state.agent_outputs["estate_planner"] = estate_dict = estate_analysis.model_dump()
             finally:
                 end_span(step_span_id)
                 set_current_context(obs_session_id, workflow_span_id)
@@ -105,9 +148,9 @@ class WorkflowOrchestrator:
                 investment_analysis = self.investment_agent.analyze_investments(
                     portfolio_data.holdings,
                     portfolio_data.portfolio_summary,
-                    state.user_context.dict()
+                    user_context_dict
                 )
-                state.agent_outputs["investment_analyst"] = investment_analysis.dict()
+                state.agent_outputs["investment_analyst"] = investment_dict = investment_analysis.model_dump()
             finally:
                 end_span(step_span_id)
                 set_current_context(obs_session_id, workflow_span_id)
@@ -122,11 +165,11 @@ class WorkflowOrchestrator:
             return {
                 "session_id": state.session_id,
                 "observability_session_id": obs_session_id,
-                "portfolio_data": portfolio_data.dict(),
-                "tax_analysis": tax_analysis.dict(),
-                "estate_analysis": estate_analysis.dict(),
-                "investment_analysis": investment_analysis.dict(),
-                "workflow_state": state.dict()
+                "portfolio_data": portfolio_dict,
+                "tax_analysis": tax_dict,
+                "estate_analysis": estate_dict,
+                "investment_analysis": investment_dict,
+                "workflow_state": state.model_dump()
             }
         except Exception as e:
             logger.error(f"Error in sequential workflow: {e}")
@@ -146,6 +189,12 @@ class WorkflowOrchestrator:
         Returns:
             Comprehensive analysis results
         """
+        return run_sync(self.execute_parallel_workflow_async(query, user_context))
+    
+    async def execute_parallel_workflow_async(self, query: str,
+                                              user_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async version of execute_parallel_workflow for callers already in an event loop."""
+        self._load_agents()
         obs_session_id: Optional[str] = None
         try:
             obs_session_id = start_session(query=query, workflow_type="parallel")
@@ -156,55 +205,27 @@ class WorkflowOrchestrator:
                 user_context=UserContext(**user_context) if user_context else UserContext()
             )
 
-            logger.info("Gathering portfolio data...")
-            step_span_id = start_span(obs_session_id, workflow_span_id, SpanKind.AGENT, "portfolio_data")
-            set_current_context(obs_session_id, step_span_id)
-            try:
-                portfolio_request = {"action": "get_all", "filters": {}}
-                portfolio_data = self.portfolio_agent.process_request(portfolio_request)
-                state.data_cache["portfolio_data"] = portfolio_data.dict()
-            finally:
-                end_span(step_span_id)
-                set_current_context(obs_session_id, workflow_span_id)
-
-            logger.info("Executing parallel analysis...")
-            agent_span_ids = []
-            for name, parent in [("tax_advisor", workflow_span_id), ("estate_planner", workflow_span_id), ("investment_analyst", workflow_span_id)]:
-                agent_span_ids.append(start_span(obs_session_id, parent, SpanKind.AGENT, name))
-
-            set_current_context(obs_session_id, agent_span_ids[0])
-            try:
-                tax_analysis = self.tax_agent.analyze_portfolio(
-                    portfolio_data.holdings,
-                    state.user_context.dict()
-                )
-            finally:
-                end_span(agent_span_ids[0])
-
-            set_current_context(obs_session_id, agent_span_ids[1])
-            try:
-                estate_analysis = self.estate_agent.analyze_estate(
-                    portfolio_data.portfolio_summary,
-                    portfolio_data.holdings,
-                    state.user_context.dict()
-                )
-            finally:
-                end_span(agent_span_ids[1])
-
-            set_current_context(obs_session_id, agent_span_ids[2])
-            try:
-                investment_analysis = self.investment_agent.analyze_investments(
-                    portfolio_data.holdings,
-                    portfolio_data.portfolio_summary,
-                    state.user_context.dict()
-                )
-            finally:
-                end_span(agent_span_ids[2])
-
+            # Each analysis starts as soon as the data it needs is ready; the
+            # three analysts only depend on portfolio_data, so they overlap
+            logger.info("Executing analysis graph...")
+            user_context_dict = state.user_context.model_dump()
+            # The analysts' LLM enhancements are coalesced into one provider request,
+            # recorded under the workflow span
             set_current_context(obs_session_id, workflow_span_id)
-            state.agent_outputs["tax_advisor"] = tax_analysis.dict()
-            state.agent_outputs["estate_planner"] = estate_analysis.dict()
-            state.agent_outputs["investment_analyst"] = investment_analysis.dict()
+            with batched_llm_insights():
+                results = await run_dag(self._analysis_nodes(user_context_dict, obs_session_id, workflow_span_id))
+            tax_analysis = results["tax_advisor"]
+            estate_analysis = results["estate_planner"]
+            investment_analysis = results["investment_analyst"]
+
+            portfolio_data = self.portfolio_agent.with_allocation(
+                results["portfolio_data"], results["portfolio_allocation"]
+            )
+            portfolio_dict = portfolio_data.model_dump()
+            state.data_cache["portfolio_data"] = portfolio_dict
+            state.agent_outputs["tax_advisor"] = tax_dict = tax_analysis.model_dump()
+            state.agent_outputs["estate_planner"] = estate_dict = estate_analysis.model_dump()
+            state.agent_outputs["investment_analyst"] = investment_dict = investment_analysis.model_dump()
             state.workflow_status = "completed"
             state.update()
 
@@ -214,15 +235,71 @@ class WorkflowOrchestrator:
             return {
                 "session_id": state.session_id,
                 "observability_session_id": obs_session_id,
-                "portfolio_data": portfolio_data.dict(),
-                "tax_analysis": tax_analysis.dict(),
-                "estate_analysis": estate_analysis.dict(),
-                "investment_analysis": investment_analysis.dict(),
-                "workflow_state": state.dict()
+                "portfolio_data": portfolio_dict,
+                "tax_analysis": tax_dict,
+                "estate_analysis": estate_dict,
+                "investment_analysis": investment_dict,
+                "workflow_state": state.model_dump()
             }
         except Exception as e:
             logger.error(f"Error in parallel workflow: {e}")
             if obs_session_id:
                 end_session(obs_session_id, status="error", error=str(e))
             return {"error": str(e), "status": "error"}
-
+    
+    def _analysis_nodes(self, user_context: Dict[str, Any], obs_session_id: str,
+                        workflow_span_id: str) -> List[Node]:
+        """
+        Declare the analysis workflow graph: portfolio data, then the tax,
+        estate and investment analyses that depend on it, alongside the
+        allocation query that only the final portfolio output needs.
+        
+        Args:
+            user_context: User context dictionary
+            obs_session_id: Observability session ID
+            workflow_span_id: Span ID of the workflow, parent of each node's span
+            
+        Returns:
+            Nodes for run_dag, named after their agent spans
+        """
+        def traced(name: str, deps: List[str], run) -> Node:
+            async def coro_factory(results: Dict[str, Any]):
+                # Each node runs in its own task and context copy, so spans don't clash
+                span_id = start_span(obs_session_id, workflow_span_id, SpanKind.AGENT, name)
+                set_current_context(obs_session_id, span_id)
+                try:
+                    return await run(results)
+                finally:
+                    end_span(span_id)
+            return Node(name, deps, coro_factory)
+        
+        async def portfolio_data(results):
+            # Holdings, summary and metrics; the analysts start on these
+            return self.portfolio_agent.get_core_data()
+        
+        async def portfolio_allocation(results):
+            # Runs on a worker thread while the analyses proceed; it starts after
+            # portfolio_data so the two never use the database at the same time
+            return await asyncio.to_thread(self.portfolio_agent.get_allocation)
+        
+        async def tax_advisor(results):
+            data = results["portfolio_data"]
+            return await self.tax_agent.analyze_portfolio_async(data.holdings, user_context)
+        
+        async def estate_planner(results):
+            data = results["portfolio_data"]
+            return await self.estate_agent.analyze_estate_async(data.portfolio_summary, data.holdings, user_context)
+        
+        async def investment_analyst(results):
+            data = results["portfolio_data"]
+            return await self.investment_agent.analyze_investments_async(
+                data.holdings, data.portfolio_summary, user_context
+            )
+        
+        return [
+            traced("portfolio_data", [], portfolio_data),
+            traced("portfolio_allocation", ["portfolio_data"], portfolio_allocation),
+            traced("tax_advisor", ["portfolio_data"], tax_advisor),
+            traced("estate_planner", ["portfolio_data"], estate_planner),
+            traced("investment_analyst", ["portfolio_data"], investment_analyst),
+        ]
@@ -16,6 +16,7 @@ from .hooks import (
     set_current_context,
     get_current_context,
 )
+from .usage_queue import UsageQueue, usage_queue
 
 __all__ = [
     "SpanKind",
@@ -30,4 +31,6 @@ __all__ = [
     "record_agent_output",
     "set_current_context",
     "get_current_context",
+    "UsageQueue",
+    "usage_queue",
 ]
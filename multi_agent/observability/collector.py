@@ -3,39 +3,55 @@ In-memory collector for observability events.
 Stores sessions and spans for retrieval by the web UI or external tools.
 """
 
+import importlib.util
+import json
+import queue
 import threading
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict, deque
+from itertools import islice
+from operator import attrgetter
+from typing import Deque, Dict, Any, Optional, List, Union
 from datetime import datetime
 from .events import Span, SpanKind
 
+# The UI reads sessions as JSON; orjson is optional and much faster than json
+if importlib.util.find_spec('orjson') is not None:
+    import orjson
 
-class ObservabilityCollector:
-    """Singleton collector for spans and sessions."""
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
+else:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=str).encode("utf-8")
+
+# Per-session work is guarded by one of these striped locks, so concurrent
+# sessions don't contend; must be a power of two
+_LOCK_STRIPES = 16
 
-    _instance: Optional["ObservabilityCollector"] = None
-    _lock = threading.Lock()
 
-    def __new__(cls) -> "ObservabilityCollector":
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
+class ObservabilityCollector:
+    """Collector for spans and sessions; use the shared instance from get_observer()."""
 
     def __init__(self) -> None:
-        if hasattr(self, "_initialized") and self._initialized:
-            return
-        self._initialized = True
-        self._sessions: Dict[str, Dict[str, Any]] = {}
-        self._spans: Dict[str, List[Span]] = {}  # session_id -> list of spans
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # oldest first
+        self._spans: Dict[str, Deque[Span]] = {}  # session_id -> most recent spans
         self._spans_by_id: Dict[str, Span] = {}  # span_id -> Span
         self._max_sessions = 100
         self._max_spans_per_session = 500
-        self._lock = threading.Lock()
+        # Lock order: _sessions_lock before any stripe lock, never the reverse
+        self._sessions_lock = threading.Lock()
+        self._stripe_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        # Span events are applied by a background thread so recording a span
+        # on the request path is a single enqueue
+        self._ingest: "queue.SimpleQueue[Union[Span, tuple, threading.Event]]" = queue.SimpleQueue()
+        threading.Thread(target=self._drain, name="observability-ingest", daemon=True).start()
+
+    def _lock_for(self, session_id: str) -> threading.Lock:
+        return self._stripe_locks[hash(session_id) & (_LOCK_STRIPES - 1)]
 
     def start_session(self, query: Optional[str] = None, workflow_type: str = "sequential") -> str:
         session_id = f"sess_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{id(self) % 100000}"
-        with self._lock:
+        with self._sessions_lock:
             self._sessions[session_id] = {
                 "session_id": session_id,
                 "query": query,
@@ -45,12 +61,13 @@ class ObservabilityCollector:
                 "status": "running",
                 "span_count": 0,
             }
-            self._spans[session_id] = []
+            self._sessions.move_to_end(session_id)
+            self._spans[session_id] = deque(maxlen=self._max_spans_per_session)
             self._trim_sessions()
         return session_id
 
     def end_session(self, session_id: str, status: str = "completed", error: Optional[str] = None) -> None:
-        with self._lock:
+        with self._lock_for(session_id):
             if session_id in self._sessions:
                 self._sessions[session_id]["end_time"] = datetime.utcnow().isoformat() + "Z"
                 self._sessions[session_id]["status"] = status
@@ -58,44 +75,100 @@ class ObservabilityCollector:
                     self._sessions[session_id]["error"] = error
 
     def add_span(self, span: Span) -> None:
-        with self._lock:
-            sid = span.session_id
-            if sid not in self._spans:
-                self._spans[sid] = []
-            if len(self._spans[sid]) < self._max_spans_per_session:
-                self._spans[sid].append(span)
-                self._spans_by_id[span.span_id] = span  # allow end_span to find it
-            if sid in self._sessions:
-                self._sessions[sid]["span_count"] = len(self._spans[sid])
+        self._ingest.put(span)
+
+    def end_span(self, span_id: str, end_ns: int, error: Optional[str] = None,
+                 metadata: Optional[Dict[str, Any]] = None) -> None:
+        self._ingest.put((span_id, end_ns, error, metadata))
+
+    def flush(self, timeout: float = 1.0) -> None:
+        """Wait until the span events queued so far have been applied."""
+        done = threading.Event()
+        self._ingest.put(done)
+        done.wait(timeout)
+
+    def _drain(self) -> None:
+        while True:
+            event = self._ingest.get()
+            try:
+                if isinstance(event, Span):
+                    self._record_span(event)
+                elif isinstance(event, threading.Event):
+                    event.set()
+                else:
+                    self._end_span(*event)
+            except Exception:
+                pass  # a bad event must not stop ingestion
+
+    def _record_span(self, span: Span) -> None:
+        sid = span.session_id
+        with self._lock_for(sid):
+            spans = self._spans.get(sid)
+            if spans is None:
+                spans = self._spans[sid] = deque(maxlen=self._max_spans_per_session)
+            # A full session keeps its most recent spans; unindex the one evicted
+            if len(spans) == spans.maxlen:
+                self._spans_by_id.pop(spans[0].span_id, None)
+            spans.append(span)
+            self._spans_by_id[span.span_id] = span  # allow end_span to find it
+            session = self._sessions.get(sid)
+            if session is not None:
+                session["span_count"] = len(spans)
+
+    def _end_span(self, span_id: str, end_ns: int, error: Optional[str],
+                  metadata: Optional[Dict[str, Any]]) -> None:
+        span = self._spans_by_id.get(span_id)
+        if span is None:
+            return
+        with self._lock_for(span.session_id):
+            # Metadata first: end() freezes the serialized span
+            if metadata:
+                span.metadata.update(metadata)
+            span.end(error=error, end_ns=end_ns)
 
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            if session_id not in self._sessions:
+        """
+        Session header plus its spans, oldest first.
+
+        Ended spans are returned as their shared frozen payloads rather than
+        copies, so treat the result as read-only.
+        """
+        self.flush()
+        with self._lock_for(session_id):
+            header = self._sessions.get(session_id)
+            if header is None:
                 return None
-            session = dict(self._sessions[session_id])
-            spans = [s.to_dict() for s in self._spans.get(session_id, [])]
-            spans.sort(key=lambda x: x["start_time"])
-            session["spans"] = spans
-            return session
+            session = {**header}
+            spans = sorted(self._spans.get(session_id, ()), key=attrgetter("start_ns"))
+        # Serialize outside the lock so polling doesn't hold up span ingestion
+        session["spans"] = [s._frozen if s._frozen is not None else s.to_dict() for s in spans]
+        return session
+
+    def get_session_json(self, session_id: str) -> Optional[bytes]:
+        """get_session serialized as JSON bytes, or None if the session is unknown."""
+        session = self.get_session(session_id)
+        return None if session is None else _dumps(session)
 
     def list_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
-        with self._lock:
-            sessions = list(self._sessions.values())
-            sessions.sort(key=lambda x: x["start_time"], reverse=True)
-            return sessions[:limit]
+        self.flush()
+        with self._sessions_lock:
+            # Sessions are kept in start order, so the newest are at the end
+            return list(islice(reversed(self._sessions.values()), limit))
 
     def _trim_sessions(self) -> None:
-        if len(self._sessions) <= self._max_sessions:
-            return
-        by_time = sorted(self._sessions.items(), key=lambda x: x[1]["start_time"])
-        to_remove = len(by_time) - self._max_sessions
-        for i in range(to_remove):
-            sid = by_time[i][0]
-            for span in self._spans.get(sid, []):
-                self._spans_by_id.pop(span.span_id, None)
-            del self._sessions[sid]
-            del self._spans[sid]
+        while len(self._sessions) > self._max_sessions:
+            sid = next(iter(self._sessions))
+            with self._lock_for(sid):
+                for span in self._spans.get(sid, []):
+                    self._spans_by_id.pop(span.span_id, None)
+                del self._sessions[sid]
+                del self._spans[sid]
+
+
+# Created once at import (the import lock makes this thread-safe), so
+# get_observer() is a plain lookup on the hook hot path
+_OBSERVER = ObservabilityCollector()
 
 
 def get_observer() -> ObservabilityCollector:
-    return ObservabilityCollector()
+    return _OBSERVER
@@ -5,9 +5,20 @@ Event and span types for observability.
 from enum import Enum
 from typing import Dict, Any, Optional
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 import uuid
 
+# Offset from the monotonic clock to Unix time, so monotonic stamps can be
+# shown as wall-clock times without reading the clock again
+_EPOCH_NS = time.time_ns() - time.monotonic_ns()
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def _ns_to_iso(ns: int) -> str:
+    """Format a time.monotonic_ns() stamp as an ISO UTC time."""
+    return (_UNIX_EPOCH + timedelta(microseconds=(_EPOCH_NS + ns) // 1000)).isoformat() + "Z"
+
 
 class SpanKind(str, Enum):
     """Type of span for categorization."""
@@ -17,7 +28,8 @@ class SpanKind(str, Enum):
     AGENT_MESSAGE = "agent_message"  # Data passed from one agent to another
 
 
-@dataclass
+# slots: the collector can hold up to 50k spans, so skip the per-instance __dict__
+@dataclass(slots=True)
 class Span:
     """A single observability span (unit of work)."""
     span_id: str
@@ -25,28 +37,43 @@ class Span:
     parent_span_id: Optional[str]
     kind: SpanKind
     name: str
-    start_time: str  # ISO format
+    # ISO format; when not given, formatted from start_ns/end_ns in to_dict
+    start_time: Optional[str] = None
     end_time: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     error: Optional[str] = None
+    # time.monotonic_ns() stamps; the write path only records these, and
+    # durations and ordering need no ISO parsing
+    start_ns: int = 0
+    end_ns: Optional[int] = None
+    # Serialized form, built once the span has ended
+    _frozen: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
 
     def to_dict(self) -> Dict[str, Any]:
+        if self._frozen is not None:
+            return dict(self._frozen)
+        return self._build_dict()
+
+    def _build_dict(self) -> Dict[str, Any]:
         return {
             "span_id": self.span_id,
             "session_id": self.session_id,
             "parent_span_id": self.parent_span_id,
             "kind": self.kind.value if isinstance(self.kind, SpanKind) else self.kind,
             "name": self.name,
-            "start_time": self.start_time,
-            "end_time": self.end_time,
+            "start_time": self.start_time or (_ns_to_iso(self.start_ns) if self.start_ns else None),
+            "end_time": self.end_time or (_ns_to_iso(self.end_ns) if self.end_ns is not None else None),
             "metadata": self.metadata,
             "error": self.error,
             "duration_ms": self.duration_ms(),
         }
 
     def duration_ms(self) -> Optional[float]:
-        if not self.end_time:
+        if self.start_ns and self.end_ns is not None:
+            return (self.end_ns - self.start_ns) / 1e6
+        if not self.start_time or not self.end_time:
             return None
+        # Spans built without monotonic stamps fall back to the ISO times
         try:
             start = datetime.fromisoformat(self.start_time.replace("Z", "+00:00"))
             end = datetime.fromisoformat(self.end_time.replace("Z", "+00:00"))
@@ -54,7 +81,9 @@ class Span:
         except Exception:
             return None
 
-    def end(self, error: Optional[str] = None) -> None:
-        self.end_time = datetime.utcnow().isoformat() + "Z"
+    def end(self, error: Optional[str] = None, end_ns: Optional[int] = None) -> None:
+        self.end_ns = time.monotonic_ns() if end_ns is None else end_ns
         if error:
             self.error = error
+        # Ended spans don't change, so serialize once for every later read
+        self._frozen = self._build_dict()
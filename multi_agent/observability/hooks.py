@@ -2,26 +2,20 @@
 Observability hooks: call these from orchestrator, agents, and LLM tools.
 """
 
-import uuid
+import secrets
+import sys
 import time
+from functools import lru_cache
 from typing import Dict, Any, Optional
-from datetime import datetime
 
 from .events import Span, SpanKind
 from .collector import get_observer
-from . import context as _ctx
-
-def set_current_context(session_id: Optional[str], parent_span_id: Optional[str]) -> None:
-    """Set current context so nested LLM calls attach to the right parent."""
-    _ctx.set_current_context(session_id, parent_span_id)
-
-def get_current_context() -> tuple:
-    """Get (session_id, parent_span_id) for current context."""
-    return _ctx.get_current_context()
+from .context import set_current_context, get_current_context
 
 
 def _new_span_id() -> str:
-    return f"span_{uuid.uuid4().hex[:12]}"
+    # 6 random bytes give the same 12 hex chars as a truncated uuid4, without drawing 16
+    return "span_" + secrets.token_hex(6)
 
 
 def start_session(query: Optional[str] = None, workflow_type: str = "sequential") -> str:
@@ -53,23 +47,28 @@ def start_span(
         parent_span_id=parent_span_id,
         kind=kind,
         name=name,
-        start_time=datetime.utcnow().isoformat() + "Z",
-        metadata=dict(metadata),
+        metadata=metadata,  # **metadata is already a fresh dict per call
+        start_ns=time.monotonic_ns(),
     )
-    observer = get_observer()
-    observer.add_span(span)
-    observer._spans_by_id[span_id] = span
+    get_observer().add_span(span)
     return span_id
 
 
 def end_span(span_id: str, error: Optional[str] = None, **metadata: Any) -> None:
     """End a span and optionally add metadata."""
-    observer = get_observer()
-    span = observer._spans_by_id.get(span_id)
-    if span:
-        span.end(error=error)
-        if metadata:
-            span.metadata.update(metadata)
+    # The end time is taken now; the collector applies it off the request path
+    get_observer().end_span(span_id, time.monotonic_ns(), error=error, metadata=metadata)
+
+
+# Longest prompt/response preview stored on an LLM span; callers that
+# truncate at the source should stay within it to avoid a second slice
+PREVIEW_MAX_CHARS = 500
+
+
+@lru_cache(maxsize=64)
+def _llm_span_tags(provider: str, model: str) -> tuple:
+    """Interned (provider, model, span name); repeated across every call to the same model."""
+    return sys.intern(provider), sys.intern(model), sys.intern(f"llm:{provider}:{model}")
 
 
 def record_llm_call(
@@ -87,15 +86,21 @@ def record_llm_call(
     sid, pid = get_current_context() if (session_id is None and parent_span_id is None) else (session_id, parent_span_id)
     if not sid:
         return ""
+    # Previews are usually already short; only slice the long ones
+    if prompt_preview and len(prompt_preview) > PREVIEW_MAX_CHARS:
+        prompt_preview = prompt_preview[:PREVIEW_MAX_CHARS]
+    if response_preview and len(response_preview) > PREVIEW_MAX_CHARS:
+        response_preview = response_preview[:PREVIEW_MAX_CHARS]
+    provider, model, name = _llm_span_tags(provider, model)
     span_id = start_span(
         sid,
         pid,
         SpanKind.LLM_CALL,
-        f"llm:{provider}:{model}",
+        name,
         provider=provider,
         model=model,
-        prompt_preview=prompt_preview[:500] if prompt_preview else "",
-        response_preview=response_preview[:500] if response_preview else "",
+        prompt_preview=prompt_preview or "",
+        response_preview=response_preview or "",
         duration_ms=duration_ms,
         **extra,
     )
@@ -0,0 +1,68 @@
+"""
+Batched LLM usage events.
+
+Agents put one small event per LLM enhancement; events are flushed as a single
+log line every max_batch events or flush_interval seconds, whichever comes first.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _log_batch(events: List[Dict[str, Any]]) -> None:
+    """Default sink: one INFO line summarizing the batch per agent and analysis type."""
+    counts = Counter((e.get("agent"), e.get("type")) for e in events)
+    cached = sum(1 for e in events if e.get("cached"))
+    breakdown = ", ".join(f"{agent}/{kind}={n}" for (agent, kind), n in sorted(counts.items(), key=str))
+    logger.info("LLM usage: %d enhancements (%d cached): %s", len(events), cached, breakdown)
+
+
+class UsageQueue:
+    """Thread-safe buffer that hands usage events to a sink in batches."""
+
+    def __init__(self, max_batch: int = 50, flush_interval: float = 5.0,
+                 sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.sink = sink or _log_batch
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """Buffer an event; flushes immediately once max_batch events are pending."""
+        event.setdefault("ts", time.time())
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= self.max_batch
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="usage-queue", daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send all pending events to the sink."""
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return
+        try:
+            self.sink(events)
+        except Exception as e:
+            logger.debug(f"Usage sink failed: {e}")
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+usage_queue = UsageQueue()
+atexit.register(usage_queue.flush)
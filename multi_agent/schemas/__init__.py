@@ -2,14 +2,19 @@
 Schemas for agent communication and data structures.
 """
 
+from importlib import import_module
+
 from .messages import AgentMessage, MessageType, MessagePriority
-from .agent_outputs import (
-    PortfolioDataOutput,
-    TaxAdvisorOutput,
-    EstatePlannerOutput,
-    InvestmentAnalystOutput
-)
-from .workflow_state import WorkflowState
+
+# The output and workflow models are only loaded when first accessed, so
+# importing the message types does not build every agent's Pydantic model
+_LAZY_IMPORTS = {
+    'PortfolioDataOutput': '.agent_outputs',
+    'TaxAdvisorOutput': '.agent_outputs',
+    'EstatePlannerOutput': '.agent_outputs',
+    'InvestmentAnalystOutput': '.agent_outputs',
+    'WorkflowState': '.workflow_state',
+}
 
 __all__ = [
     'AgentMessage',
@@ -22,3 +27,15 @@ __all__ = [
     'WorkflowState'
 ]
 
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -11,6 +11,17 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _to_float_array(values: List[Any]) -> np.ndarray:
+    """Convert values to a float64 array; None and unparseable values become 0."""
+    try:
+        # Numbers, Decimals and None (as NaN) convert directly
+        array = np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        array = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64, copy=True)
+    array[np.isnan(array)] = 0.0
+    return array
+
+
 class AnalysisTools:
     """Tools for financial analysis and calculations."""
     
@@ -95,51 +106,50 @@ class AnalysisTools:
     
     @staticmethod
     def identify_tax_loss_harvesting(holdings: List[Dict[str, Any]],
-                                    min_loss: float = 100.0) -> List[Dict[str, Any]]:
+                                    min_loss: float = 100.0,
+                                    sort: bool = True) -> List[Dict[str, Any]]:
         """
         Identify tax loss harvesting opportunities.
         
         Args:
             holdings: List of holding dictionaries
             min_loss: Minimum loss amount to consider
+            sort: Sort by tax benefit, largest first; callers that only need
+                  the top few can pass False and select them with heapq.nlargest
             
         Returns:
             List of tax loss harvesting opportunities
         """
-        opportunities = []
+        if not holdings:
+            return []
         
-        for holding in holdings:
-            # Handle None values safely
-            book_value_raw = holding.get('book_value')
-            market_value_raw = holding.get('market_value')
-            
-            try:
-                book_value = float(book_value_raw) if book_value_raw is not None else 0.0
-            except (ValueError, TypeError):
-                book_value = 0.0
-            
-            try:
-                market_value = float(market_value_raw) if market_value_raw is not None else 0.0
-            except (ValueError, TypeError):
-                market_value = 0.0
-            
-            if book_value > market_value and book_value > 0:  # Unrealized loss
-                loss = book_value - market_value
-                if loss >= min_loss:
-                    # Estimate tax benefit (50% inclusion, assume 30% tax rate)
-                    tax_benefit = loss * 0.5 * 0.30
-                    
-                    opportunities.append({
-                        "security": holding.get('security_name') or 'Unknown',
-                        "symbol": holding.get('symbol') or '',
-                        "unrealized_loss": float(loss),
-                        "tax_benefit": float(tax_benefit),
-                        "account": holding.get('account_number') or '',
-                        "institution": holding.get('institution_name') or ''
-                    })
-        
-        # Sort by tax benefit (descending)
-        opportunities.sort(key=lambda x: x['tax_benefit'], reverse=True)
+        # Coerce both value columns in one pass each instead of per holding
+        book_values = _to_float_array([holding.get('book_value') for holding in holdings])
+        market_values = _to_float_array([holding.get('market_value') for holding in holdings])
+        
+        losses = book_values - market_values
+        # Unrealized losses above the threshold
+        indices = np.flatnonzero((book_values > market_values) & (book_values > 0) & (losses >= min_loss))
+        losses = losses[indices]
+        # Estimate tax benefit (50% inclusion, assume 30% tax rate)
+        tax_benefits = losses * 0.5 * 0.30
+        
+        # Sort by tax benefit (descending); stable so ties keep holdings order
+        if sort:
+            order = np.argsort(-tax_benefits, kind='stable')
+            indices, losses, tax_benefits = indices[order], losses[order], tax_benefits[order]
+        
+        opportunities = []
+        for i, loss, tax_benefit in zip(indices.tolist(), losses.tolist(), tax_benefits.tolist()):
+            holding = holdings[i]
+            opportunities.append({
+                "security": holding.get('security_name') or 'Unknown',
+                "symbol": holding.get('symbol') or '',
+                "unrealized_loss": loss,
+                "tax_benefit": tax_benefit,
+                "account": holding.get('account_number') or '',
+                "institution": holding.get('institution_name') or ''
+            })
         
         return opportunities
     
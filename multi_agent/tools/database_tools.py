@@ -10,7 +10,7 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, register_dependent_cache
 from config import DB_CONFIG
 from analysis.portfolio_analyzer import PortfolioAnalyzer
 import logging
@@ -65,7 +65,7 @@ class DatabaseTools:
             return []
         
         try:
-            holdings = self.db_manager.get_latest_holdings(institution, account_number)
+            holdings = self.db_manager.get_latest_holdings(institution, account_number, columns=None)
             # Convert to list of dicts
             return [dict(h) for h in holdings]
         except Exception as e:
@@ -152,6 +152,59 @@ class DatabaseTools:
             logger.error(f"Error getting diversification score: {e}")
             return {}
     
+    def get_bundle(self, institution: Optional[str] = None,
+                   account_number: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get summary, holdings, concentration and diversification together.
+        
+        The unfiltered latest holdings are fetched once; the summary and both
+        risk metrics are computed from them and the requested holdings are
+        filtered from the same rows. The allocation is a separate query
+        (get_portfolio_allocation) so callers can start on the holdings first.
+        
+        Args:
+            institution: Optional institution filter for holdings
+            account_number: Optional account number filter for holdings
+        
+        Returns:
+            Dictionary with portfolio_summary, holdings, concentration_metrics
+            and diversification_metrics
+        """
+        if not self.analyzer:
+            return {
+                "portfolio_summary": {"error": "Database not initialized"},
+                "holdings": [],
+                "concentration_metrics": {},
+                "diversification_metrics": {}
+            }
+        
+        try:
+            columns, rows = self.db_manager.get_latest_holdings(as_records=True, columns=None)
+            dashboard = self.analyzer.get_dashboard(records=(columns, rows))
+            
+            institution_idx = columns.index('institution_name')
+            account_idx = columns.index('account_number')
+            holdings = [
+                dict(zip(columns, row)) for row in rows
+                if (not institution or row[institution_idx] == institution)
+                and (not account_number or row[account_idx] == account_number)
+            ]
+            
+            return {
+                "portfolio_summary": dashboard['summary'],
+                "holdings": holdings,
+                "concentration_metrics": dashboard['concentration'],
+                "diversification_metrics": dashboard['diversification']
+            }
+        except Exception as e:
+            logger.error(f"Error getting portfolio bundle: {e}")
+            return {
+                "portfolio_summary": {"error": str(e)},
+                "holdings": [],
+                "concentration_metrics": {},
+                "diversification_metrics": {}
+            }
+    
     def get_holdings_by_account(self, institution: Optional[str] = None,
                                account_number: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -3,16 +3,123 @@ LLM tools for agent reasoning and analysis.
 Supports Anthropic Claude and DeepSeek APIs.
 """
 
+import asyncio
+import importlib.util
 import os
+import threading
 import time
 import logging
+import weakref
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 import json
 
 logger = logging.getLogger(__name__)
 
+# Role instructions per analysis type
+SYSTEM_PROMPTS = {
+    "tax": """You are a Canadian tax expert. Analyze the portfolio data and provide
+    tax optimization recommendations. Focus on capital gains, tax-loss harvesting,
+    and account type optimization. Be specific and actionable.""",
 
-def _record_llm_span(provider: str, model: str, prompt_preview: str, response_preview: str, duration_ms: float, error: Optional[str] = None) -> None:
+    "estate": """You are an estate planning expert. Analyze the portfolio structure
+    and provide estate planning recommendations. Focus on probate minimization,
+    beneficiary designations, and product recommendations. Be specific and actionable.""",
+
+    "investment": """You are an investment analyst. Analyze the portfolio holdings
+    and provide investment recommendations. Focus on diversification, risk management,
+    and rebalancing opportunities. Be specific and actionable.""",
+
+    "general": """You are a financial advisor. Analyze the portfolio data and provide
+    comprehensive financial recommendations. Be specific and actionable."""
+}
+
+# JSON shape of one analysis's insights
+INSIGHTS_STRUCTURE = """{
+    "explanation": "Clear, concise explanation of the analysis for a client, highlighting key findings and actionable insights",
+    "recommendations": [
+        {
+            "priority": "High/Medium/Low",
+            "action": "Specific action to take",
+            "rationale": "Why this recommendation",
+            "impact": "Expected impact or benefit"
+        }
+    ]
+}"""
+
+# Static instructions for generate_insights; kept ahead of the data so the
+# provider can cache the shared prompt prefix across analyses
+INSIGHTS_INSTRUCTIONS = "Respond with a single JSON object with the following structure:\n" + INSIGHTS_STRUCTURE
+
+# Static instructions for generate_insights_batch_async
+BATCH_INSIGHTS_INSTRUCTIONS = """You are given several analyses of the same client portfolio, each under
+its analysis type. Respond with a single JSON object with one key per analysis type given, each
+value having the following structure:
+""" + INSIGHTS_STRUCTURE
+
+# Static instructions for generate_recommendations
+RECOMMENDATIONS_INSTRUCTIONS = """Provide your analysis and recommendations in JSON format with the following structure:
+{
+    "summary": "Brief summary of findings",
+    "recommendations": [
+        {
+            "priority": "High/Medium/Low",
+            "action": "Specific action to take",
+            "rationale": "Why this recommendation",
+            "impact": "Expected impact or benefit"
+        }
+    ]
+}"""
+
+# Static instructions for explain_analysis
+EXPLANATION_INSTRUCTIONS = """Explain the analysis results you are given in clear, understandable
+language for a client. Provide a clear, concise explanation that highlights key findings
+and actionable insights."""
+
+
+# Connection pool shared by every provider client, so calls after the first
+# skip the TCP/TLS handshake; HTTP/2 when the optional h2 package is installed
+HTTP_MAX_CONNECTIONS = 32
+_HTTP2 = importlib.util.find_spec('h2') is not None
+
+
+def _http_limits():
+    import httpx
+    return httpx.Limits(max_keepalive_connections=HTTP_MAX_CONNECTIONS, max_connections=HTTP_MAX_CONNECTIONS)
+
+
+@lru_cache(maxsize=1)
+def _http_client():
+    """Process-wide pooled HTTP client for the sync provider clients."""
+    import httpx
+    return httpx.Client(http2=_HTTP2, limits=_http_limits())
+
+
+# An async connection pool is bound to the event loop it was created in, so
+# each loop gets its own: loop -> (httpx.AsyncClient, {LLMTools: provider client}).
+# Entries go away with their loop; aclose_async_clients() closes the pool first.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+# Guards client creation; LLMTools instances are shared across threads
+_clients_lock = threading.Lock()
+
+
+async def aclose_async_clients() -> None:
+    """Close the async connection pool of the running event loop, if one was opened."""
+    with _clients_lock:
+        entry = _async_clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+
+
+def _preview(text: Optional[str]) -> str:
+    """Truncate text for an LLM span, ellipsis included, within the span's preview limit."""
+    from ..observability.hooks import PREVIEW_MAX_CHARS
+    if not text:
+        return ""
+    return text if len(text) <= PREVIEW_MAX_CHARS else text[:PREVIEW_MAX_CHARS - 1] + "…"
+
+
+def _record_llm_span(provider: str, model: str, prompt_preview: str, response_preview: str, duration_ms: float, error: Optional[str] = None, **extra: Any) -> None:
     """Record LLM call to observability if context is set."""
     try:
         from ..observability.hooks import record_llm_call, get_current_context
@@ -27,6 +134,7 @@ def _record_llm_span(provider: str, model: str, prompt_preview: str, response_pr
                 session_id=session_id,
                 parent_span_id=parent_span_id,
                 error=error,
+                **extra,
             )
     except Exception:
         pass
@@ -79,13 +187,15 @@ class LLMTools:
                 self.model = None
         
         self._llm_available = bool(self.api_key)
+        self._client = None
     
     def is_available(self) -> bool:
         """Check if LLM is available."""
         return self._llm_available
     
     def analyze_with_llm(self, prompt: str, system_prompt: Optional[str] = None,
-                        temperature: float = 0.3, max_tokens: int = 2000) -> Optional[str]:
+                        temperature: float = 0.3, max_tokens: int = 2000,
+                        json_mode: bool = False) -> Optional[str]:
         """
         Analyze a prompt using LLM.
         
@@ -94,6 +204,7 @@ class LLMTools:
             system_prompt: Optional system prompt
             temperature: LLM temperature
             max_tokens: Maximum tokens in response
+            json_mode: Ask for a JSON object response (DeepSeek/OpenAI JSON mode)
             
         Returns:
             LLM response text or None if unavailable
@@ -104,13 +215,13 @@ class LLMTools:
 
         provider = "DeepSeek" if self.use_deepseek else "Anthropic"
         model_name = self.model or "unknown"
-        prompt_preview = (prompt[:500] + "…") if len(prompt) > 500 else prompt
+        prompt_preview = _preview(prompt)
         start = time.perf_counter()
         err: Optional[str] = None
         response_text: Optional[str] = None
         try:
             if self.use_deepseek:
-                response_text = self._call_deepseek(prompt, system_prompt, temperature, max_tokens)
+                response_text = self._call_deepseek(prompt, system_prompt, temperature, max_tokens, json_mode)
             elif self.use_anthropic:
                 response_text = self._call_anthropic(prompt, system_prompt, temperature, max_tokens)
             else:
@@ -122,21 +233,65 @@ class LLMTools:
             raise
         finally:
             duration_ms = (time.perf_counter() - start) * 1000
-            response_preview = (response_text[:500] + "…") if response_text and len(response_text) > 500 else (response_text or "")
+            response_preview = _preview(response_text)
             _record_llm_span(provider, model_name, prompt_preview, response_preview, duration_ms, error=err)
 
         return response_text
     
+    async def analyze_with_llm_async(self, prompt: str, system_prompt: Optional[str] = None,
+                                     temperature: float = 0.3, max_tokens: int = 2000,
+                                     json_mode: bool = False,
+                                     span_metadata: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Async version of analyze_with_llm, so independent LLM calls can be
+        awaited concurrently.
+        
+        Args:
+            prompt: User prompt/question
+            system_prompt: Optional system prompt
+            temperature: LLM temperature
+            max_tokens: Maximum tokens in response
+            json_mode: Ask for a JSON object response (DeepSeek/OpenAI JSON mode)
+            span_metadata: Extra metadata for the observability span
+            
+        Returns:
+            LLM response text or None if unavailable
+        """
+        if not self._llm_available:
+            logger.warning("LLM not available - no API key configured")
+            return None
+
+        provider = "DeepSeek" if self.use_deepseek else "Anthropic"
+        model_name = self.model or "unknown"
+        prompt_preview = _preview(prompt)
+        start = time.perf_counter()
+        err: Optional[str] = None
+        response_text: Optional[str] = None
+        try:
+            if self.use_deepseek:
+                response_text = await self._call_deepseek_async(prompt, system_prompt, temperature, max_tokens, json_mode)
+            elif self.use_anthropic:
+                response_text = await self._call_anthropic_async(prompt, system_prompt, temperature, max_tokens)
+            else:
+                logger.warning("No LLM provider configured")
+                return None
+        except Exception as e:
+            err = str(e)
+            logger.error(f"Error calling LLM: {e}")
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            response_preview = _preview(response_text)
+            _record_llm_span(provider, model_name, prompt_preview, response_preview, duration_ms, error=err,
+                             **(span_metadata or {}))
+
+        return response_text
+    
     def _call_deepseek(self, prompt: str, system_prompt: Optional[str],
-                      temperature: float, max_tokens: int) -> str:
+                      temperature: float, max_tokens: int, json_mode: bool = False) -> str:
         """Call DeepSeek API."""
         try:
-            import openai
-            
-            client = openai.OpenAI(
-                api_key=self.api_key,
-                base_url="https://api.deepseek.com/v1"
-            )
+            client = self._get_client()
             
             model_name = self.model if 'deepseek' in self.model.lower() else 'deepseek-chat'
             
@@ -145,11 +300,16 @@ class LLMTools:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
             
+            kwargs = {}
+            if json_mode:
+                kwargs["response_format"] = {"type": "json_object"}
+            
             response = client.chat.completions.create(
                 model=model_name,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **kwargs
             )
             
             return response.choices[0].message.content.strip()
@@ -164,9 +324,7 @@ class LLMTools:
                        temperature: float, max_tokens: int) -> str:
         """Call Anthropic API."""
         try:
-            import anthropic
-            
-            client = anthropic.Anthropic(api_key=self.api_key)
+            client = self._get_client()
             
             model_name = self.model if 'claude' in self.model.lower() else 'claude-3-opus-20240229'
             
@@ -192,6 +350,227 @@ class LLMTools:
             logger.error(f"Anthropic API error: {e}")
             raise
     
+    def _get_client(self):
+        """Create the sync API client on first use; it reuses the shared connection pool."""
+        with _clients_lock:
+            if self._client is None:
+                if self.use_deepseek:
+                    import openai
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key,
+                        base_url="https://api.deepseek.com/v1",
+                        http_client=_http_client()
+                    )
+                else:
+                    import anthropic
+                    self._client = anthropic.Anthropic(api_key=self.api_key, http_client=_http_client())
+            return self._client
+    
+    def _get_async_client(self):
+        """Return the async API client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with _clients_lock:
+            entry = _async_clients.get(loop)
+            if entry is None:
+                import httpx
+                # Concurrent calls in this loop (e.g. a parallel workflow) share the pool
+                entry = _async_clients[loop] = (httpx.AsyncClient(http2=_HTTP2, limits=_http_limits()), {})
+            http_client, clients = entry
+            client = clients.get(self)
+            if client is None:
+                if self.use_deepseek:
+                    import openai
+                    client = openai.AsyncOpenAI(
+                        api_key=self.api_key,
+                        base_url="https://api.deepseek.com/v1",
+                        http_client=http_client
+                    )
+                else:
+                    import anthropic
+                    client = anthropic.AsyncAnthropic(api_key=self.api_key, http_client=http_client)
+                clients[self] = client
+        return client
+    
+    async def _call_deepseek_async(self, prompt: str, system_prompt: Optional[str],
+                                   temperature: float, max_tokens: int, json_mode: bool = False) -> str:
+        """Call DeepSeek API without blocking the event loop."""
+        try:
+            client = self._get_async_client()
+            
+            model_name = self.model if 'deepseek' in self.model.lower() else 'deepseek-chat'
+            
+            messages = []
+            if system_prompt:
+                messages.append({"role": "system", "content": system_prompt})
+            messages.append({"role": "user", "content": prompt})
+            
+            kwargs = {}
+            if json_mode:
+                kwargs["response_format"] = {"type": "json_object"}
+            
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **kwargs
+            )
+            
+            return response.choices[0].message.content.strip()
+        except ImportError:
+            logger.error("OpenAI library not installed. Install with: pip install openai")
+            return None
+        except Exception as e:
+            logger.error(f"DeepSeek API error: {e}")
+            raise
+    
+    async def _call_anthropic_async(self, prompt: str, system_prompt: Optional[str],
+                                    temperature: float, max_tokens: int) -> str:
+        """Call Anthropic API without blocking the event loop."""
+        try:
+            client = self._get_async_client()
+            
+            model_name = self.model if 'claude' in self.model.lower() else 'claude-3-opus-20240229'
+            
+            kwargs = {
+                "model": model_name,
+                "max_tokens": max_tokens,
+                "messages": [{"role": "user", "content": prompt}]
+            }
+            
+            if system_prompt:
+                kwargs["system"] = system_prompt
+            
+            response = await client.messages.create(**kwargs)
+            
+            return response.content[0].text.strip()
+        except ImportError:
+            logger.error("Anthropic library not installed. Install with: pip install anthropic")
+            return None
+        except Exception as e:
+            logger.error(f"Anthropic API error: {e}")
+            raise
+    
+    def generate_insights(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
+        """
+        Generate the explanation and recommendations for an analysis in a
+        single LLM call, so the data is only sent once.
+        
+        Args:
+            data: Analysis data dictionary
+            analysis_type: Type of analysis (tax, estate, investment)
+            
+        Returns:
+            Dictionary with 'explanation' and 'recommendations'
+        """
+        if not self._llm_available:
+            return {"explanation": "LLM not available for explanation.", "recommendations": []}
+        
+        prompt, system_prompt = self._insights_prompt(data, analysis_type)
+        response = self.analyze_with_llm(prompt, system_prompt, temperature=0.3, json_mode=True)
+        return self._parse_insights(response)
+    
+    async def generate_insights_async(self, data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
+        """Async version of generate_insights."""
+        if not self._llm_available:
+            return {"explanation": "LLM not available for explanation.", "recommendations": []}
+        
+        prompt, system_prompt = self._insights_prompt(data, analysis_type)
+        response = await self.analyze_with_llm_async(prompt, system_prompt, temperature=0.3, json_mode=True)
+        return self._parse_insights(response)
+    
+    def _insights_prompt(self, data: Dict[str, Any], analysis_type: str):
+        """Build the (prompt, system_prompt) pair for generate_insights; static text first, data last."""
+        system_prompt = SYSTEM_PROMPTS.get(analysis_type, SYSTEM_PROMPTS["general"]) + "\n\n" + INSIGHTS_INSTRUCTIONS
+        prompt = f"""{analysis_type.capitalize()} analysis data:
+
+{json.dumps(data, indent=2, sort_keys=True, default=str)}
+"""
+        return prompt, system_prompt
+    
+    async def generate_insights_batch_async(self, tasks: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate insights for several analyses in a single LLM call, so they
+        share one round trip and one system prompt.
+        
+        Args:
+            tasks: Dictionaries with 'analysis_type' and 'data'; analysis types must be distinct
+            
+        Returns:
+            Insights dictionaries ('explanation', 'recommendations') in task
+            order; None for an analysis missing from the response
+        """
+        analysis_types = [task['analysis_type'] for task in tasks]
+        if len(set(analysis_types)) != len(analysis_types):
+            raise ValueError(f"Batched analysis types must be distinct: {analysis_types}")
+        if not self._llm_available:
+            return [{"explanation": "LLM not available for explanation.", "recommendations": []} for _ in tasks]
+        
+        prompt, system_prompt = self._batch_insights_prompt(tasks)
+        response = await self.analyze_with_llm_async(
+            prompt, system_prompt, temperature=0.3, max_tokens=2000 * len(tasks), json_mode=True,
+            span_metadata={"tasks": analysis_types}
+        )
+        return self._parse_batch_insights(response, analysis_types)
+    
+    def _batch_insights_prompt(self, tasks: List[Dict[str, Any]]):
+        """Build the (prompt, system_prompt) pair for generate_insights_batch_async; static text first, data last."""
+        system_prompt = "\n\n".join(
+            [SYSTEM_PROMPTS["general"]]
+            + [SYSTEM_PROMPTS.get(task['analysis_type'], SYSTEM_PROMPTS["general"]) for task in tasks]
+            + [BATCH_INSIGHTS_INSTRUCTIONS]
+        )
+        analyses = {task['analysis_type']: task['data'] for task in tasks}
+        prompt = f"""Analyses by type:
+
+{json.dumps(analyses, indent=2, sort_keys=True, default=str)}
+"""
+        return prompt, system_prompt
+    
+    def _parse_batch_insights(self, response: Optional[str],
+                              analysis_types: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Split a generate_insights_batch_async response into per-analysis insights."""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(analysis_types)
+        if not response:
+            return results
+        
+        try:
+            json_start = response.find('{')
+            json_end = response.rfind('}') + 1
+            if json_start < 0 or json_end <= json_start:
+                return results
+            result = json.loads(response[json_start:json_end])
+        except json.JSONDecodeError:
+            logger.warning("Could not parse batched LLM response as JSON")
+            return results
+        
+        for i, analysis_type in enumerate(analysis_types):
+            entry = result.get(analysis_type)
+            if isinstance(entry, dict):
+                results[i] = {
+                    "explanation": entry.get("explanation") or "Could not generate explanation.",
+                    "recommendations": entry.get("recommendations", [])
+                }
+        return results
+    
+    def _parse_insights(self, response: Optional[str]) -> Dict[str, Any]:
+        """Extract explanation and recommendations from a generate_insights response."""
+        insights = {"explanation": "Could not generate explanation.", "recommendations": []}
+        if not response:
+            return insights
+        
+        try:
+            json_start = response.find('{')
+            json_end = response.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                result = json.loads(response[json_start:json_end])
+                insights["explanation"] = result.get("explanation") or insights["explanation"]
+                insights["recommendations"] = result.get("recommendations", [])
+        except json.JSONDecodeError:
+            logger.warning("Could not parse LLM response as JSON")
+        
+        return insights
+    
     def generate_recommendations(self, context: Dict[str, Any], 
                                  recommendation_type: str = "general") -> List[Dict[str, Any]]:
         """
@@ -207,45 +586,24 @@ class LLMTools:
         if not self._llm_available:
             return []
         
-        system_prompts = {
-            "tax": """You are a Canadian tax expert. Analyze the portfolio data and provide
-            tax optimization recommendations. Focus on capital gains, tax-loss harvesting,
-            and account type optimization. Be specific and actionable.""",
-            
-            "estate": """You are an estate planning expert. Analyze the portfolio structure
-            and provide estate planning recommendations. Focus on probate minimization,
-            beneficiary designations, and product recommendations. Be specific and actionable.""",
-            
-            "investment": """You are an investment analyst. Analyze the portfolio holdings
-            and provide investment recommendations. Focus on diversification, risk management,
-            and rebalancing opportunities. Be specific and actionable.""",
-            
-            "general": """You are a financial advisor. Analyze the portfolio data and provide
-            comprehensive financial recommendations. Be specific and actionable."""
-        }
-        
-        system_prompt = system_prompts.get(recommendation_type, system_prompts["general"])
+        prompt, system_prompt = self._recommendations_prompt(context, recommendation_type)
+        response = self.analyze_with_llm(prompt, system_prompt, temperature=0.3)
+        return self._parse_recommendations(response)
+    
+    def _recommendations_prompt(self, context: Dict[str, Any], recommendation_type: str):
+        """Build the (prompt, system_prompt) pair for generate_recommendations; static text first, data last."""
+        system_prompt = (SYSTEM_PROMPTS.get(recommendation_type, SYSTEM_PROMPTS["general"])
+                         + "\n\n" + RECOMMENDATIONS_INSTRUCTIONS)
         
         prompt = f"""Analyze the following portfolio data and provide recommendations:
 
-{json.dumps(context, indent=2)}
-
-Provide your analysis and recommendations in JSON format with the following structure:
-{{
-    "summary": "Brief summary of findings",
-    "recommendations": [
-        {{
-            "priority": "High/Medium/Low",
-            "action": "Specific action to take",
-            "rationale": "Why this recommendation",
-            "impact": "Expected impact or benefit"
-        }}
-    ]
-}}
+{json.dumps(context, indent=2, sort_keys=True)}
 """
         
-        response = self.analyze_with_llm(prompt, system_prompt, temperature=0.3)
-        
+        return prompt, system_prompt
+    
+    def _parse_recommendations(self, response: Optional[str]) -> List[Dict[str, Any]]:
+        """Extract the recommendations list from an LLM response."""
         if not response:
             return []
         
@@ -277,16 +635,17 @@ Provide your analysis and recommendations in JSON format with the following stru
         if not self._llm_available:
             return "LLM not available for explanation."
         
-        prompt = f"""Explain the following {analysis_type} analysis results in clear,
-        understandable language for a client:
-
-{json.dumps(data, indent=2)}
-
-Provide a clear, concise explanation that highlights key findings and actionable insights.
-"""
-        
-        system_prompt = f"You are a financial advisor explaining {analysis_type} analysis to a client."
-        
+        prompt, system_prompt = self._explanation_prompt(data, analysis_type)
         response = self.analyze_with_llm(prompt, system_prompt, temperature=0.5)
         return response or "Could not generate explanation."
+    
+    def _explanation_prompt(self, data: Dict[str, Any], analysis_type: str):
+        """Build the (prompt, system_prompt) pair for explain_analysis; static text first, data last."""
+        system_prompt = (f"You are a financial advisor explaining {analysis_type} analysis to a client."
+                         + "\n\n" + EXPLANATION_INSTRUCTIONS)
+        
+        prompt = f"""{analysis_type.capitalize()} analysis results:
 
+{json.dumps(data, indent=2, sort_keys=True)}
+"""
+        return prompt, system_prompt
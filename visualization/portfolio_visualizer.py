@@ -12,7 +12,6 @@ from typing import Dict, List, Optional
 from analysis.portfolio_analyzer import PortfolioAnalyzer
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Set style
@@ -430,9 +429,10 @@ class PortfolioVisualizer:
         Args:
             output_path: Path to save the report
         """
-        summary = self.analyzer.get_portfolio_summary()
-        concentration = self.analyzer.get_concentration_risk()
-        diversification = self.analyzer.get_diversification_score()
+        dashboard = self.analyzer.get_dashboard()
+        summary = dashboard['summary']
+        concentration = dashboard['concentration']
+        diversification = dashboard['diversification']
 
         with open(output_path, 'w') as f:
             f.write("=" * 80 + "\n")
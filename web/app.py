@@ -7,7 +7,7 @@ import sys
 import json
 import logging
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 
@@ -380,7 +380,7 @@ def comprehensive_review():
         }
     """
     try:
-        from multi_agent.flows.financial_advisory_flow import FinancialAdvisoryFlow
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         data = request.get_json()
         user_context = data.get('user_context', {})
@@ -394,7 +394,7 @@ def comprehensive_review():
         logger.info(f"Processing comprehensive review with context: {user_context}")
 
         # Execute comprehensive review
-        flow = FinancialAdvisoryFlow()
+        flow = get_default_flow()
         results = flow.get_comprehensive_review(user_context)
 
         return jsonify(results)
@@ -428,7 +428,7 @@ def agent_query():
         }
     """
     try:
-        from multi_agent.flows.financial_advisory_flow import FinancialAdvisoryFlow
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         data = request.get_json()
         if not data or 'query' not in data:
@@ -441,7 +441,7 @@ def agent_query():
         logger.info(f"Processing agent query: {query}")
 
         # Execute query through flow
-        flow = FinancialAdvisoryFlow()
+        flow = get_default_flow()
         results = flow.process_query(query, user_context, workflow_type)
 
         return jsonify(results)
@@ -468,7 +468,7 @@ def get_portfolio_data():
         action: "get_all"|"get_summary"|"get_holdings"|"get_allocation" (default: get_all)
     """
     try:
-        from multi_agent.agents.portfolio_data_agent import PortfolioDataAgent
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         # Get query parameters
         institution = request.args.get('institution')
@@ -488,12 +488,12 @@ def get_portfolio_data():
 
         logger.info(f"Fetching portfolio data: {agent_request}")
 
-        # Get data from agent
-        portfolio_agent = PortfolioDataAgent()
+        # Get data from the shared agent rather than opening a new database pool per request
+        portfolio_agent = get_default_flow().orchestrator.portfolio_agent
         portfolio_data = portfolio_agent.process_request(agent_request)
 
         # Convert to dict for JSON serialization
-        return jsonify(portfolio_data.dict())
+        return jsonify(portfolio_data.model_dump())
 
     except ImportError as e:
         logger.error(f"Multi-agent system not available: {e}")
@@ -521,23 +521,23 @@ def tax_analysis():
         }
     """
     try:
-        from multi_agent.agents.portfolio_data_agent import PortfolioDataAgent
-        from multi_agent.agents.tax_advisor_agent import TaxAdvisorAgent
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         data = request.get_json()
         user_context = data.get('user_context', {})
 
         logger.info(f"Processing tax analysis with context: {user_context}")
 
+        # Shared agents, rather than new ones (and a new database pool) per request
+        orchestrator = get_default_flow().orchestrator
+
         # Get portfolio data first
-        portfolio_agent = PortfolioDataAgent()
-        portfolio_data = portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
+        portfolio_data = orchestrator.portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
 
         # Run tax analysis
-        tax_agent = TaxAdvisorAgent()
-        tax_result = tax_agent.analyze_portfolio(portfolio_data.holdings, user_context)
+        tax_result = orchestrator.tax_agent.analyze_portfolio(portfolio_data.holdings, user_context)
 
-        return jsonify(tax_result.dict())
+        return jsonify(tax_result.model_dump())
 
     except ImportError as e:
         logger.error(f"Multi-agent system not available: {e}")
@@ -566,27 +566,27 @@ def estate_analysis():
         }
     """
     try:
-        from multi_agent.agents.portfolio_data_agent import PortfolioDataAgent
-        from multi_agent.agents.estate_planner_agent import EstatePlannerAgent
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         data = request.get_json()
         user_context = data.get('user_context', {})
 
         logger.info(f"Processing estate analysis with context: {user_context}")
 
+        # Shared agents, rather than new ones (and a new database pool) per request
+        orchestrator = get_default_flow().orchestrator
+
         # Get portfolio data first
-        portfolio_agent = PortfolioDataAgent()
-        portfolio_data = portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
+        portfolio_data = orchestrator.portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
 
         # Run estate analysis
-        estate_agent = EstatePlannerAgent()
-        estate_result = estate_agent.analyze_estate(
+        estate_result = orchestrator.estate_agent.analyze_estate(
             portfolio_data.portfolio_summary,
             portfolio_data.holdings,
             user_context
         )
 
-        return jsonify(estate_result.dict())
+        return jsonify(estate_result.model_dump())
 
     except ImportError as e:
         logger.error(f"Multi-agent system not available: {e}")
@@ -613,27 +613,27 @@ def investment_analysis():
         }
     """
     try:
-        from multi_agent.agents.portfolio_data_agent import PortfolioDataAgent
-        from multi_agent.agents.investment_analyst_agent import InvestmentAnalystAgent
+        from multi_agent.flows.financial_advisory_flow import get_default_flow
 
         data = request.get_json()
         user_context = data.get('user_context', {})
 
         logger.info(f"Processing investment analysis with context: {user_context}")
 
+        # Shared agents, rather than new ones (and a new database pool) per request
+        orchestrator = get_default_flow().orchestrator
+
         # Get portfolio data first
-        portfolio_agent = PortfolioDataAgent()
-        portfolio_data = portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
+        portfolio_data = orchestrator.portfolio_agent.process_request({'action': 'get_all', 'filters': {}})
 
         # Run investment analysis
-        investment_agent = InvestmentAnalystAgent()
-        investment_result = investment_agent.analyze_investments(
+        investment_result = orchestrator.investment_agent.analyze_investments(
             portfolio_data.holdings,
             portfolio_data.portfolio_summary,
             user_context
         )
 
-        return jsonify(investment_result.dict())
+        return jsonify(investment_result.model_dump())
 
     except ImportError as e:
         logger.error(f"Multi-agent system not available: {e}")
@@ -680,10 +680,11 @@ def observability_get_session(session_id):
     observer = _get_observability()
     if observer is None:
         return jsonify({'error': 'Observability not available'}), 503
-    session = observer.get_session(session_id)
-    if session is None:
+    # Serialized by the collector (orjson when installed) instead of jsonify
+    payload = observer.get_session_json(session_id)
+    if payload is None:
         return jsonify({'error': 'Session not found'}), 404
-    return jsonify(session)
+    return Response(payload, mimetype='application/json')
 
 
 if __name__ == '__main__':